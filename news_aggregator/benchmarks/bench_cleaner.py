@@ -0,0 +1,108 @@
+"""
+Measures NewsAPIService article cleaning throughput on a NewsAPI-shaped corpus
+and checks that the compiled cleaner returns the same results as the original
+marker-by-marker implementation.
+
+Usage (from the directory with manage.py):
+    python -m benchmarks.bench_cleaner --articles 5000 --repeat 5
+"""
+import argparse
+import os
+import re
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_aggregator.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from news.cleaning import content_cleaner  # noqa: E402
+from news.services import NewsAPIService  # noqa: E402
+
+from .corpus import build_payload  # noqa: E402
+
+
+def legacy_clean_content(content):
+    """NewsAPIService._clean_content before the compiled cleaner, kept as reference"""
+    if not content:
+        return ''
+
+    if '[+' in content and 'chars]' in content:
+        content = content.split('[+')[0].strip()
+
+    if 'PROMOTED' in content:
+        before_promoted = content.split('PROMOTED')[0].strip()
+        if len(before_promoted) > 50:
+            content = before_promoted
+        else:
+            return ''
+
+    copyright_markers = [
+        'E-mail :',
+        '[email protected]',
+        '+380 95 641 22 07',
+        'R40-02280',
+        'R40-02162',
+        '01032,',
+        '© 2014-2025',
+    ]
+
+    for marker in copyright_markers:
+        if marker in content:
+            before_marker = content.split(marker)[0].strip()
+            if len(before_marker) > 50:
+                content = before_marker
+            else:
+                return ''
+
+    content = re.sub(r'^[\(\)\s\-\r\n]+', '', content)
+
+    if len(content) < 100:
+        return ''
+
+    words = [w for w in content.split() if len(w) > 0]
+    if not words:
+        return ''
+
+    short_words = [w for w in words if len(w) <= 2]
+    if len(short_words) > len(words) * 0.6:
+        return ''
+
+    return content.strip()
+
+
+def throughput(func, contents, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for content in contents:
+            func(content)
+        best = min(best, time.perf_counter() - started)
+    return len(contents) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    articles = build_payload(args.articles)['articles']
+    contents = [article['content'] for article in articles]
+
+    mismatches = [c for c in contents if legacy_clean_content(c) != content_cleaner.clean(c)]
+    print(f'{len(contents)} articles, {len(mismatches)} mismatches with legacy cleaner')
+
+    print(f'legacy clean    {throughput(legacy_clean_content, contents, args.repeat):10.0f} articles/s')
+    print(f'compiled clean  {throughput(content_cleaner.clean, contents, args.repeat):10.0f} articles/s')
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        NewsAPIService._process_articles(articles)
+    elapsed = (time.perf_counter() - started) / args.repeat
+    print(f'process         {len(articles) / elapsed:10.0f} articles/s')
+
+
+if __name__ == '__main__':
+    main()
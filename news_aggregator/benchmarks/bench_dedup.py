@@ -0,0 +1,75 @@
+"""
+Measures near-duplicate detection (news.dedup) on a NewsAPI-shaped corpus where
+a share of articles is republished by another source with small edits: signature
+and index lookup time, rewrites found and distinct articles merged by mistake.
+
+Usage (from the directory with manage.py):
+    python -m benchmarks.bench_dedup --articles 20000 --rewrites 0.2
+"""
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_aggregator.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from news import pipeline  # noqa: E402
+from news.dedup import NearDuplicateIndex, minhash, story_text  # noqa: E402
+
+from .corpus import build_payload  # noqa: E402
+
+
+def rewrite(rng, article, index):
+    """Same story from another source: suffix in the title, one word of the description dropped"""
+    words = (article.get('description') or '').split()
+    if len(words) > 3:
+        del words[rng.randrange(len(words))]
+    return dict(
+        article,
+        title=f"{article['title']} - Wire {index}",
+        source=f'Wire {index}',
+        description=' '.join(words),
+        url=f"{article['url']}?rewrite={index}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--rewrites', type=float, default=0.2, help='Share of articles republished once more')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    # Without the deduplicate stage, which is what is measured here
+    originals = list(pipeline.process(build_payload(args.articles)['articles'], stages=pipeline.STAGES[:-1]))
+    rewrites = [(index, rewrite(rng, article, index)) for index, article in enumerate(originals)
+                if rng.random() < args.rewrites]
+
+    started = time.perf_counter()
+    signatures = [minhash(story_text(article)) for article in originals]
+    rewrite_signatures = [minhash(story_text(article)) for _index, article in rewrites]
+    signature_time = time.perf_counter() - started
+
+    index = NearDuplicateIndex()
+    started = time.perf_counter()
+    stories = [index.cluster(signature) for signature in signatures]
+    found = sum(
+        index.cluster(signature) == stories[original]
+        for (original, _article), signature in zip(rewrites, rewrite_signatures)
+    )
+    lookup_time = time.perf_counter() - started
+
+    total = len(signatures) + len(rewrite_signatures)
+    print(f'{len(originals)} articles, {len(rewrites)} rewrites')
+    print(f'signature      {signature_time / total * 1e6:7.1f} us/article')
+    print(f'index lookup   {lookup_time / total * 1e6:7.1f} us/article')
+    print(f'rewrites found {found / len(rewrites):7.1%}')
+    print(f'merged by mistake {len(originals) - len(set(stories))} of {len(originals)} distinct articles')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures render time of the news feed page with cold and warm fragment cache.
+
+Usage (from the directory with manage.py):
+    python -m benchmarks.bench_templates --repeat 200 --language uk
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_aggregator.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from news.article_store import ArticleStore  # noqa: E402
+from news.saved import SavedURLSet  # noqa: E402
+from news.services import NewsAPIService, CATEGORIES, SOURCES  # noqa: E402
+
+from .corpus import build_payload  # noqa: E402
+
+
+def build_context(articles):
+    return {
+        'articles': articles,
+        'saved_urls': SavedURLSet({}),
+        'categories': CATEGORIES,
+        'sources': SOURCES,
+        'selected_category': '',
+        'selected_source': '',
+        'search_query': '',
+        'current_page': 1,
+        'fragment_cache_ttl': settings.NEWS_FRAGMENT_CACHE_TTL,
+    }
+
+
+def measure(request, context, repeat, clear):
+    best = float('inf')
+    for _ in range(repeat):
+        if clear:
+            cache.clear()
+        started = time.perf_counter()
+        render_to_string('news/index.html', context, request=request)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--language', default='uk')
+    args = parser.parse_args()
+
+    articles = NewsAPIService._process_articles(build_payload(40)['articles'])[:20]
+    ArticleStore.put_many(articles)
+
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    request.LANGUAGE_CODE = args.language
+    context = build_context(articles)
+
+    cold = measure(request, context, args.repeat, clear=True)
+    warm = measure(request, context, args.repeat, clear=False)
+    print(f'{len(articles)} cards, language {args.language}')
+    print(f'cold cache  {cold:7.2f} ms/page')
+    print(f'warm cache  {warm:7.2f} ms/page  ({cold / warm:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Deterministic NewsAPI-shaped payloads for benchmarks"""
+import random
+
+SOURCES = [
+    ('bbc-news', 'BBC News'),
+    ('cnn', 'CNN'),
+    ('reuters', 'Reuters'),
+    (None, 'Ukrainska Pravda'),
+    ('the-verge', 'The Verge'),
+    ('techcrunch', 'TechCrunch'),
+]
+
+WORDS = (
+    'government market energy report city team players season company data security '
+    'climate election court officials analysts investors growth talks border health '
+    'study researchers launch update a an of to in on at by is it as'
+).split()
+
+TAILS = [
+    ' [+2841 chars]',
+    ' PROMOTED Sponsored links from our partners',
+    ' E-mail : [email protected] +380 95 641 22 07',
+    ' © 2014-2025 All rights reserved. R40-02280',
+    '',
+    '',
+    '',
+]
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def build_article(rng, index):
+    source_id, source_name = rng.choice(SOURCES)
+    title = _sentence(rng, rng.randint(6, 14))
+    if index % 25 == 0:
+        title = '[Removed]'
+
+    content = ' '.join(_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(1, 4)))
+    if rng.random() < 0.1:
+        content = '(\r\n- ' + content
+    content += rng.choice(TAILS)
+
+    return {
+        'source': {'id': source_id, 'name': source_name},
+        'author': rng.choice([None, 'Staff', 'Associated Press']),
+        'title': title,
+        'description': _sentence(rng, rng.randint(10, 30)) if rng.random() > 0.1 else None,
+        'url': f'https://news.example.com/{index}-{rng.getrandbits(32):08x}',
+        'urlToImage': f'https://img.example.com/{index}.jpg' if rng.random() > 0.2 else None,
+        'publishedAt': f'2025-11-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00Z',
+        'content': content if rng.random() > 0.05 else None,
+    }
+
+
+def build_payload(size, seed=42):
+    """Returns /top-headlines style response with `size` articles"""
+    rng = random.Random(seed)
+    articles = [build_article(rng, index) for index in range(size)]
+    return {'status': 'ok', 'totalResults': size, 'articles': articles}
@@ -0,0 +1,117 @@
+"""
+Compares throughput of the news feed under WSGI (thread per request) and
+ASGI (single event loop) against a local fake NewsAPI with fixed latency.
+Both run the same number of requests in flight: WSGI with one thread per
+concurrent request, ASGI with as many tasks.
+
+Usage (from the directory with manage.py):
+    python -m benchmarks.wsgi_vs_asgi --requests 400 --concurrency 100 --latency 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_aggregator.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+
+from news.http_client import AsyncHTTPClient  # noqa: E402
+from news.services import NewsAPIService  # noqa: E402
+
+from .corpus import build_payload  # noqa: E402
+
+
+class FakeNewsAPIHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    body = b''
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_upstream(latency):
+    FakeNewsAPIHandler.latency = latency
+    FakeNewsAPIHandler.body = json.dumps(build_payload(20)).encode()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeNewsAPIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_wsgi(total, concurrency):
+    local = threading.local()
+
+    def request(i):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        return local.client.get('/', {'search': f'wsgi-{i}'}).status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(request, range(total)))
+
+
+async def run_asgi(total, concurrency):
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(i):
+        async with semaphore:
+            response = await client.get('/', {'search': f'asgi-{i}'})
+            return response.status_code
+
+    return await asyncio.gather(*(request(i) for i in range(total)))
+
+
+def measure(name, func, total):
+    started = time.perf_counter()
+    statuses = func()
+    elapsed = time.perf_counter() - started
+    failed = sum(status != 200 for status in statuses)
+    print(f'{name:5} {total / elapsed:8.1f} req/s  {elapsed:6.2f}s  failed={failed}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=int, default=200, help='Upstream latency in ms')
+    args = parser.parse_args()
+
+    server = start_upstream(args.latency / 1000)
+    NewsAPIService.BASE_URL = f'http://127.0.0.1:{server.server_port}/v2'
+
+    # Every request must reach the upstream, so response caching is disabled
+    with override_settings(
+        CACHES={alias: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'} for alias in settings.CACHES},
+        HTTP_POOL_SIZE=args.concurrency,
+        ALLOWED_HOSTS=['*'],
+    ):
+        print(f'upstream latency {args.latency}ms, {args.requests} requests, {args.concurrency} in flight')
+        measure('wsgi', lambda: run_wsgi(args.requests, args.concurrency), args.requests)
+        # As set up by news_aggregator/asgi.py
+        AsyncHTTPClient.event_loop_pool = True
+        measure('asgi', lambda: asyncio.run(run_asgi(args.requests, args.concurrency)), args.requests)
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
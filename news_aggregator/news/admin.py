@@ -1,26 +1,32 @@
-import requests
 from django.shortcuts import render
 from django.contrib import admin
-from .models import NewsArticle, SavedArticle
-from django.conf import settings
+from .models import NewsArticle, SavedArticle, APIHealthCheck
+from .health import HealthMonitor
 
 
 @admin.register(NewsArticle)
 class NewsArticleAdmin(admin.ModelAdmin):
-    list_display = ['title', 'source','created_at']
-    list_filter = ['created_at']
+    list_display = ['title', 'source', 'category', 'published_at', 'created_at']
+    list_filter = ['category', 'created_at']
     search_fields = ['title', 'description', 'source']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'fetched_at']
 
 
 @admin.register(SavedArticle)
 class SavedArticleAdmin(admin.ModelAdmin):
-    list_display = ['user', 'article', 'saved_at']
-    list_filter = ['saved_at']
+    list_display = ['user', 'article', 'category', 'saved_at']
+    list_filter = ['category', 'saved_at']
     search_fields = ['user__username', 'article__title']
     readonly_fields = ['saved_at']
 
 
+@admin.register(APIHealthCheck)
+class APIHealthCheckAdmin(admin.ModelAdmin):
+    list_display = ['api', 'ok', 'status_code', 'latency_ms', 'checked_at']
+    list_filter = ['api', 'ok']
+    readonly_fields = ['api', 'ok', 'status_code', 'latency_ms', 'error', 'checked_at']
+
+
 class CustomAdminSite(admin.AdminSite):
     site_header = "Система агрегації новин"
     site_title = "Адмін-панель"
@@ -28,36 +34,8 @@ class CustomAdminSite(admin.AdminSite):
 
     def each_context(self, request):
         context = super().each_context(request)
-
-        apis = [
-            {
-                "name": "NewsAPI",
-                "url": "https://newsapi.org/v2/top-headlines",
-            },
-            {
-                "name": "Google Translate API",
-                "url": "https://translate.googleapis.com/translate_a/single?client=gtx&sl=en&tl=uk&dt=t&q=hello",
-            },
-        ]
-
-        for api in apis:
-            try:
-                response = requests.get(
-                    url=api["url"],
-                    params={
-                        "country": "us",
-                        "apiKey": settings.NEWS_API_KEY
-                    },
-                    timeout=5
-                )
-                if response.status_code == 200:
-                    api["status"] = f"🟢 Доступний | {response.status_code}"
-                else:
-                    api["status"] = f"🟠 Помилка {response.status_code}"
-            except requests.exceptions.RequestException:
-                api["status"] = f"🔴 Недоступний | {response.status_code}"
-
-        context["external_apis"] = apis
+        # Filled by manage.py monitor_apis, admin pages do not call the APIs
+        context["external_apis"] = HealthMonitor.snapshot()["apis"]
         return context
 
     def index(self, request, extra_context=None):
@@ -68,3 +46,4 @@ class CustomAdminSite(admin.AdminSite):
 custom_admin_site = CustomAdminSite(name="custom_admin")
 custom_admin_site.register(NewsArticle, NewsArticleAdmin)
 custom_admin_site.register(SavedArticle, SavedArticleAdmin)
+custom_admin_site.register(APIHealthCheck, APIHealthCheckAdmin)
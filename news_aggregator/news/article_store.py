@@ -0,0 +1,58 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import article_id
+
+
+class ArticleStore:
+    """Short-lived store of feed articles keyed by article id (prefix of the URL hash).
+
+    index() puts every article it renders, so cards link to article_detail by id
+    and the detail page does not need the article posted back to the server.
+    Articles also get a 'digest' of their rendered fields, used as the card
+    fragment cache key. Articles live in the NEWS_ARTICLE_STORE_CACHE alias.
+    """
+    KEY_PREFIX = 'news:article:'
+    DIGEST_FIELDS = (
+        'url', 'title', 'description', 'content', 'image_url', 'source', 'source_id', 'category', 'published_at',
+    )
+
+    @classmethod
+    def put_many(cls, articles):
+        """Adds 'id' and 'digest' to every article and stores them. Returns the same list"""
+        cls._cache().set_many(cls._entries(articles), timeout=settings.NEWS_ARTICLE_STORE_TTL)
+        return articles
+
+    @classmethod
+    async def aput_many(cls, articles):
+        """Async version of put_many"""
+        await cls._cache().aset_many(cls._entries(articles), timeout=settings.NEWS_ARTICLE_STORE_TTL)
+        return articles
+
+    @classmethod
+    def get(cls, short_id):
+        return cls._cache().get(cls.KEY_PREFIX + short_id)
+
+    @classmethod
+    async def aget(cls, short_id):
+        return await cls._cache().aget(cls.KEY_PREFIX + short_id)
+
+    @classmethod
+    def digest(cls, article):
+        values = '\x1f'.join(str(article.get(field) or '') for field in cls.DIGEST_FIELDS)
+        return hashlib.md5(values.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _cache():
+        return caches[settings.NEWS_ARTICLE_STORE_CACHE]
+
+    @classmethod
+    def _entries(cls, articles):
+        entries = {}
+        for article in articles:
+            article['id'] = article_id(article['url'])
+            article['digest'] = cls.digest(article)
+            entries[cls.KEY_PREFIX + article['id']] = article
+        return entries
@@ -0,0 +1,75 @@
+import re
+
+COPYRIGHT_MARKERS = (
+    'PROMOTED',
+    'E-mail :',
+    '[email protected]',
+    '+380 95 641 22 07',
+    'R40-02280',
+    'R40-02162',
+    '01032,',
+    '© 2014-2025',
+)
+
+LEADING_JUNK = re.compile(r'^[\(\)\s\-\r\n]+')
+
+
+class ContentCleaner:
+    """Cleans NewsAPI article content with a precompiled rule table.
+
+    Content is truncated at `truncate_marker` when `truncate_requires` occurs
+    anywhere in it (NewsAPI "[+123 chars]" suffix), then cut before the earliest
+    cut marker and rejected if no more than `min_prefix` characters are left.
+    Each marker is searched only in the part of the text that is still kept,
+    and the text is sliced once, instead of splitting it for every marker.
+    """
+
+    def __init__(self, cut_markers, truncate_marker='[+', truncate_requires='chars]',
+                 min_prefix=50, min_length=100, max_short_word_ratio=0.6):
+        self.cut_markers = tuple(cut_markers)
+        self.truncate_marker = truncate_marker
+        self.truncate_requires = truncate_requires
+        self.min_prefix = min_prefix
+        self.min_length = min_length
+        self.max_short_word_ratio = max_short_word_ratio
+
+    def clean(self, content):
+        if not content:
+            return ''
+
+        end = len(content)
+        truncate_at = content.find(self.truncate_marker)
+        if truncate_at != -1 and self.truncate_requires in content:
+            end = len(content[:truncate_at].rstrip())
+        start = end - len(content[:end].lstrip())
+
+        cut_at = -1
+        for marker in self.cut_markers:
+            position = content.find(marker, start, end if cut_at == -1 else cut_at)
+            if position != -1:
+                cut_at = position
+
+        if cut_at == -1:
+            content = content[start:end]
+        else:
+            content = content[start:cut_at].strip()
+            if len(content) <= self.min_prefix:
+                return ''
+
+        content = LEADING_JUNK.sub('', content)
+
+        if len(content) < self.min_length:
+            return ''
+
+        words = content.split()
+        if not words:
+            return ''
+
+        long_words = len([word for word in words if len(word) > 2])
+        if len(words) - long_words > len(words) * self.max_short_word_ratio:
+            return ''
+
+        return content.strip()
+
+
+content_cleaner = ContentCleaner(COPYRIGHT_MARKERS)
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+import weakref
+
+from django.core.cache import cache
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one call whose result all callers share.
+
+    Calls are collapsed per process. With cluster=True a cache lock is taken as
+    well and processes that lose it poll `peek` for the result of the winner.
+    """
+
+    def __init__(self, name, cluster=False, lock_timeout=15, poll_interval=0.05):
+        self.name = name
+        self.cluster = cluster
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._stats = {'calls': 0, 'collapsed': 0, 'cluster_collapsed': 0}
+
+    def do(self, key, func, peek=None):
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._stats['collapsed'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_in_cluster(key, func, peek)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key, func, peek=None):
+        """Async version of do. func and peek are coroutine functions.
+        If the leader is cancelled, a waiting follower runs the call instead"""
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        with self._lock:
+            self._stats['calls'] += 1
+
+        while (future := calls.get(key)) is not None:
+            with self._lock:
+                self._stats['collapsed'] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = calls[key] = loop.create_future()
+        try:
+            result = await self._arun_in_cluster(key, func, peek)
+        except Exception as e:
+            future.set_exception(e)
+            # Followers receive the error, the leader's own raise is enough
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled leader: followers must not wait for a result that never comes
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del calls[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def _run_in_cluster(self, key, func, peek):
+        if not self.cluster:
+            return func()
+
+        lock_key = self._lock_key(key)
+        if cache.add(lock_key, True, timeout=self.lock_timeout):
+            try:
+                return func()
+            finally:
+                cache.delete(lock_key)
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            result = peek() if peek else None
+            if result is not None:
+                self._count_cluster_collapsed()
+                return result
+            if cache.get(lock_key) is None:
+                break
+        return func()
+
+    async def _arun_in_cluster(self, key, func, peek):
+        if not self.cluster:
+            return await func()
+
+        lock_key = self._lock_key(key)
+        if await cache.aadd(lock_key, True, timeout=self.lock_timeout):
+            try:
+                return await func()
+            finally:
+                await cache.adelete(lock_key)
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            result = await peek() if peek else None
+            if result is not None:
+                self._count_cluster_collapsed()
+                return result
+            if await cache.aget(lock_key) is None:
+                break
+        return await func()
+
+    def _lock_key(self, key):
+        return f'singleflight:{self.name}:{key}'
+
+    def _count_cluster_collapsed(self):
+        with self._lock:
+            self._stats['cluster_collapsed'] += 1
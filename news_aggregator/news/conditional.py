@@ -0,0 +1,70 @@
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+class PageValidators:
+    """Weak ETag and Last-Modified of a page, computed from its data before rendering.
+
+    The ETag covers everything the page is rendered from: article digests and
+    saved flags, interface language and the user. Last-Modified is the time the
+    page changed to its current ETag, kept per page and user and never earlier
+    than the previous one, so a page that returns to an older version is still
+    newer than what If-Modified-Since holds. Pages that show messages get no
+    validators, the messages would be lost on a 304.
+    """
+    KEY_PREFIX = 'news:etag:'
+
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    async def acompute(cls, request, user, *parts):
+        avatar = user.avatar_url('small') if user.is_authenticated else ''
+        page = (request.get_full_path(), request.LANGUAGE_CODE, user.pk)
+        digest = cls._hash(page + (avatar,) + parts)
+        key = cls.KEY_PREFIX + cls._hash(page)
+
+        state = await cache.aget(key)
+        if state and state[0] == digest:
+            last_modified = state[1]
+        else:
+            last_modified = int(time.time())
+            if state:
+                # One second later at least, Last-Modified has a resolution of seconds
+                last_modified = max(last_modified, state[1] + 1)
+            await cache.aset(key, (digest, last_modified), timeout=settings.NEWS_VALIDATOR_TTL)
+        return cls(f'W/"{digest}"', last_modified)
+
+    async def anot_modified(self, request):
+        """Returns 304 response if the request validators match, otherwise None"""
+        if 'If-None-Match' not in request.headers and 'If-Modified-Since' not in request.headers:
+            return None
+        if await sync_to_async(len)(get_messages(request)):
+            return None
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        return response and self.apply(request, response)
+
+    def apply(self, request, response):
+        """Sets validators and makes caches revalidate the page on every use"""
+        if getattr(get_messages(request), 'used', False):
+            return response
+        response.headers['ETag'] = self.etag
+        response.headers['Last-Modified'] = http_date(self.last_modified)
+        if request.user.is_authenticated:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    @staticmethod
+    def _hash(values):
+        return hashlib.md5('\x1f'.join(map(str, values)).encode('utf-8')).hexdigest()
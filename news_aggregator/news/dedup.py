@@ -0,0 +1,138 @@
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+WORD = re.compile(r'\w+')
+BANDS = 8
+ROWS = 4
+
+
+def _masks(count, seed=2024):
+    # Fixed seed: signatures must be comparable between processes and restarts.
+    # Distinct top bits make every mask pick its minimum from a different part
+    # of the hash space, so the values are close to independent
+    rng = random.Random(seed)
+    prefix_bits = (count - 1).bit_length()
+    return [prefix << (64 - prefix_bits) | rng.getrandbits(64 - prefix_bits) for prefix in range(count)]
+
+
+# XOR with a mask permutes 64-bit feature hashes, far cheaper than (a * x + b) % p
+_MASKS = _masks(BANDS * ROWS)
+
+
+def story_text(article):
+    """Title without the ' - Source' suffix NewsAPI adds, and description"""
+    title = article.get('title') or ''
+    source = article.get('source') or ''
+    if source and title.endswith(f' - {source}'):
+        title = title[:-len(source) - 3]
+    return f"{title} {article.get('description') or ''}"
+
+
+def minhash(text):
+    """MinHash signature of the words and word pairs in text, or None for text without words"""
+    words = WORD.findall(text.lower())
+    features = words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+    hashes = {int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big') for feature in features}
+    if not hashes:
+        return None
+    return tuple(min(value ^ mask for value in hashes) for mask in _MASKS)
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """In-memory MinHash LSH index grouping articles into story clusters.
+
+    Signatures are split into BANDS bands of ROWS values. Only signatures
+    sharing a whole band are compared, which finds rewrites of a story with a
+    few dict lookups however large the index is. A match needs an estimated
+    similarity of at least `threshold`. The index keeps the `max_size` most
+    recently seen signatures. Processes start with an empty index, `warm`
+    loads the stories of stored articles so their rewrites keep the same id.
+    """
+
+    def __init__(self, threshold=0.5, max_size=50000):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.warmed = False
+        self._tables = [{} for _ in range(BANDS)]
+        self._stories = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cluster(self, signature):
+        """Returns story id of a near-duplicate already in the index, or registers a new story.
+        Story ids are signed 64-bit integers, so they fit a BigIntegerField"""
+        with self._lock:
+            story = self._stories.get(signature)
+            if story is not None:
+                self._stories.move_to_end(signature)
+                return story
+
+            story = self._find(signature)
+            if story is None:
+                digest = hashlib.blake2b(repr(signature).encode(), digest_size=8).digest()
+                story = int.from_bytes(digest, 'big', signed=True)
+            self._add(signature, story)
+            return story
+
+    def warm(self, known):
+        """Registers (signature, story) pairs of stored articles, oldest first. Returns number of new signatures"""
+        added = 0
+        with self._lock:
+            for signature, story in known:
+                if signature not in self._stories:
+                    self._add(signature, story)
+                    added += 1
+            self.warmed = True
+        return added
+
+    def clear(self):
+        with self._lock:
+            for table in self._tables:
+                table.clear()
+            self._stories.clear()
+
+    def __len__(self):
+        return len(self._stories)
+
+    def _find(self, signature):
+        compared = set()
+        for table, band in zip(self._tables, self._bands(signature)):
+            for candidate in table.get(band, ()):
+                if candidate in compared:
+                    continue
+                compared.add(candidate)
+                if similarity(candidate, signature) >= self.threshold:
+                    return self._stories[candidate]
+        return None
+
+    def _add(self, signature, story):
+        self._stories[signature] = story
+        for table, band in zip(self._tables, self._bands(signature)):
+            table.setdefault(band, []).append(signature)
+
+        while len(self._stories) > self.max_size:
+            oldest, _story = self._stories.popitem(last=False)
+            for table, band in zip(self._tables, self._bands(oldest)):
+                signatures = table[band]
+                signatures.remove(oldest)
+                if not signatures:
+                    del table[band]
+
+    @staticmethod
+    def _bands(signature):
+        return [signature[band * ROWS:(band + 1) * ROWS] for band in range(BANDS)]
+
+
+stories = NearDuplicateIndex(
+    threshold=settings.NEWS_DEDUP_SIMILARITY,
+    max_size=settings.NEWS_DEDUP_INDEX_SIZE,
+)
@@ -0,0 +1,153 @@
+import math
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import APIHealthCheck
+
+
+class HealthMonitor:
+    """Probes external APIs on a schedule (manage.py monitor_apis).
+
+    Every probe is stored as APIHealthCheck and a snapshot with the latest status,
+    latency percentiles and error rate over HEALTH_WINDOW is kept in cache, so
+    the admin never calls the APIs itself. Probes use their own session without
+    retries, so outages and real latency are measured and the per-host stats of
+    HTTPClient only count site traffic.
+    """
+    SNAPSHOT_KEY = 'health:snapshot'
+    # The monitor snapshot expires if monitor_apis stops refreshing it
+    SNAPSHOT_INTERVALS = 3
+    APIS = [
+        {
+            'name': 'NewsAPI',
+            'url': 'https://newsapi.org/v2/top-headlines',
+            'params': {'country': 'us', 'pageSize': 1},
+            'api_key': True,
+        },
+        {
+            'name': 'Google Translate API',
+            'url': 'https://translate.googleapis.com/translate_a/single?client=gtx&sl=en&tl=uk&dt=t&q=hello',
+            'params': {},
+            'api_key': False,
+        },
+    ]
+
+    _session = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def session(cls):
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    cls._session = requests.Session()
+        return cls._session
+
+    @classmethod
+    def run(cls):
+        """Probes every API, stores results and refreshes snapshot"""
+        APIHealthCheck.objects.bulk_create([cls.probe(api) for api in cls.APIS])
+        snapshot = cls.build_snapshot()
+        cache.set(cls.SNAPSHOT_KEY, snapshot, timeout=settings.HEALTH_CHECK_INTERVAL * cls.SNAPSHOT_INTERVALS)
+        return snapshot
+
+    @classmethod
+    def probe(cls, api):
+        params = dict(api['params'])
+        if api['api_key']:
+            params['apiKey'] = settings.NEWS_API_KEY
+
+        started = time.monotonic()
+        try:
+            response = cls.session().get(api['url'], params=params, timeout=settings.HEALTH_PROBE_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            return APIHealthCheck(
+                api=api['name'],
+                ok=False,
+                latency_ms=cls._elapsed_ms(started),
+                error=str(e)[:255],
+            )
+
+        return APIHealthCheck(
+            api=api['name'],
+            ok=response.status_code == 200,
+            status_code=response.status_code,
+            latency_ms=cls._elapsed_ms(started),
+        )
+
+    @classmethod
+    def snapshot(cls):
+        """Returns latest snapshot without outbound requests.
+        Falls back to stored history when cache is not shared with the monitor"""
+        snapshot = cache.get(cls.SNAPSHOT_KEY)
+        if snapshot is None:
+            snapshot = cls.build_snapshot()
+            cache.set(cls.SNAPSHOT_KEY, snapshot, timeout=settings.HEALTH_CHECK_INTERVAL)
+        return snapshot
+
+    @classmethod
+    def build_snapshot(cls):
+        since = timezone.now() - timedelta(seconds=settings.HEALTH_WINDOW)
+        apis = []
+        for api in cls.APIS:
+            checks = list(
+                APIHealthCheck.objects.filter(api=api['name'], checked_at__gte=since)
+                .order_by('-checked_at')
+                .values('ok', 'status_code', 'latency_ms', 'error', 'checked_at')
+            )
+            apis.append(dict(cls._summary(checks), name=api['name'], url=api['url']))
+        return {'created_at': timezone.now(), 'apis': apis}
+
+    @classmethod
+    def prune(cls):
+        """Deletes history older than HEALTH_HISTORY_RETENTION"""
+        cutoff = timezone.now() - timedelta(seconds=settings.HEALTH_HISTORY_RETENTION)
+        deleted, _ = APIHealthCheck.objects.filter(checked_at__lt=cutoff).delete()
+        return deleted
+
+    @classmethod
+    def _summary(cls, checks):
+        if not checks:
+            return {
+                'status': '⚪ Немає даних',
+                'checks': 0,
+                'checked_at': None,
+                'p50_ms': None,
+                'p95_ms': None,
+                'error_rate': None,
+            }
+
+        latest = checks[0]
+        if latest['ok']:
+            status = f"🟢 Доступний | {latest['status_code']}"
+        elif latest['status_code']:
+            status = f"🟠 Помилка {latest['status_code']}"
+        else:
+            status = "🔴 Недоступний"
+
+        latencies = sorted(check['latency_ms'] for check in checks if check['latency_ms'] is not None)
+        return {
+            'status': status,
+            'checks': len(checks),
+            'checked_at': latest['checked_at'],
+            'p50_ms': cls._percentile(latencies, 0.5),
+            'p95_ms': cls._percentile(latencies, 0.95),
+            'error_rate': sum(not check['ok'] for check in checks) / len(checks),
+        }
+
+    @staticmethod
+    def _percentile(values, fraction):
+        """Nearest-rank percentile of sorted values"""
+        if not values:
+            return None
+        return round(values[max(math.ceil(fraction * len(values)) - 1, 0)], 1)
+
+    @staticmethod
+    def _elapsed_ms(started):
+        return round((time.monotonic() - started) * 1000, 1)
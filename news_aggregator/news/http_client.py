@@ -0,0 +1,215 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Network failures and timeouts worth another attempt. Other exceptions (invalid
+# arguments, bugs in the callee) fail the same way on every attempt
+TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.NetworkError,
+    httpx.ProtocolError,
+    httpx.ProxyError,
+    httpx.ConnectTimeout,
+    httpx.ReadTimeout,
+    httpx.WriteTimeout,
+    httpx.PoolTimeout,
+)
+
+
+class HTTPClient:
+    """Shared keep-alive session for outbound requests with retries and per-host metrics"""
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    # Longest wait before a retry in seconds. Retry-After is followed up to this only
+    # on the async path, urllib3 would honour any value while holding the thread
+    MAX_RETRY_DELAY = 30.0
+
+    _session = None
+    _lock = threading.Lock()
+    _stats = {}
+
+    @classmethod
+    def session(cls):
+        """Returns process-wide session, creating it on first use"""
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    cls._session = cls._build_session()
+        return cls._session
+
+    @classmethod
+    def get(cls, url, **kwargs):
+        """Sends GET request through the shared pool. Raises requests exceptions like requests.get"""
+        kwargs.setdefault('timeout', settings.HTTP_TIMEOUT)
+        started = time.monotonic()
+        try:
+            response = cls.session().get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            cls.record(url, time.monotonic() - started, error=True)
+            raise
+
+        retries = getattr(response.raw, 'retries', None)
+        cls.record(
+            url,
+            time.monotonic() - started,
+            error=response.status_code >= 500,
+            retries=len(retries.history) if retries else 0,
+        )
+        return response
+
+    @classmethod
+    def call_with_retries(cls, url, func, *args, **kwargs):
+        """Calls a function doing I/O outside of the session (e.g. googletrans)
+        using the same retry budget and metrics. Only TRANSIENT_ERRORS are retried"""
+        attempts = settings.HTTP_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except TRANSIENT_ERRORS:
+                cls.record(url, time.monotonic() - started, error=True, retries=int(attempt > 0))
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(cls.backoff(attempt))
+            else:
+                cls.record(url, time.monotonic() - started, retries=int(attempt > 0))
+                return result
+
+    @classmethod
+    def backoff(cls, attempt):
+        """Exponential backoff with jitter, in seconds, at most MAX_RETRY_DELAY"""
+        delay = min(settings.HTTP_BACKOFF_FACTOR * (2 ** attempt), cls.MAX_RETRY_DELAY)
+        return delay + random.uniform(0, settings.HTTP_BACKOFF_JITTER)
+
+    @classmethod
+    def record(cls, url, elapsed, error=False, retries=0):
+        host = urlsplit(url).netloc
+        with cls._lock:
+            stats = cls._stats.setdefault(host, {
+                'requests': 0,
+                'errors': 0,
+                'retries': 0,
+                'total_time': 0.0,
+            })
+            stats['requests'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += retries
+            stats['total_time'] += elapsed
+
+    @classmethod
+    def stats(cls):
+        """Returns per-host counters with average latency in milliseconds"""
+        with cls._lock:
+            return {
+                host: dict(values, avg_ms=round(values['total_time'] * 1000 / values['requests'], 1))
+                for host, values in cls._stats.items()
+            }
+
+    @classmethod
+    def reset(cls):
+        """Closes pooled connections and clears metrics"""
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+            cls._session = None
+            cls._stats = {}
+
+    @classmethod
+    def _build_session(cls):
+        retry = Retry(
+            total=settings.HTTP_MAX_RETRIES,
+            backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+            backoff_jitter=settings.HTTP_BACKOFF_JITTER,
+            status_forcelist=cls.RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            respect_retry_after_header=False,
+            backoff_max=cls.MAX_RETRY_DELAY,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_POOL_SIZE,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+
+class AsyncHTTPClient:
+    """Async counterpart of HTTPClient.
+
+    Under ASGI (news_aggregator/asgi.py turns on `event_loop_pool`) requests go
+    through one pooled httpx client per event loop; the server loop lives as
+    long as the process. Under WSGI and runserver every async view runs in a
+    new loop of async_to_sync, where a client per loop would never be reused
+    or closed, so requests go through the shared HTTPClient pool in a thread.
+    """
+    event_loop_pool = False
+    _clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def client(cls):
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                pool_limits=httpx.PoolLimits(
+                    max_keepalive=settings.HTTP_POOL_SIZE,
+                    max_connections=settings.HTTP_ASYNC_MAX_CONNECTIONS,
+                ),
+                timeout=settings.HTTP_TIMEOUT,
+            )
+            cls._clients[loop] = client
+        return client
+
+    @classmethod
+    async def get(cls, url, **kwargs):
+        """Sends GET request, retrying network errors, 429 and 5xx with jittered backoff"""
+        if not cls.event_loop_pool:
+            return await sync_to_async(HTTPClient.get, thread_sensitive=False)(url, **kwargs)
+
+        attempts = settings.HTTP_MAX_RETRIES + 1
+        started = time.monotonic()
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            try:
+                response = await cls.client().get(url, **kwargs)
+            except TRANSIENT_ERRORS:
+                if last_attempt:
+                    HTTPClient.record(url, time.monotonic() - started, error=True, retries=attempt)
+                    raise
+                delay = HTTPClient.backoff(attempt)
+            else:
+                if response.status_code not in HTTPClient.RETRY_STATUSES or last_attempt:
+                    HTTPClient.record(
+                        url,
+                        time.monotonic() - started,
+                        error=response.status_code >= 500,
+                        retries=attempt,
+                    )
+                    return response
+                delay = cls._retry_after(response) or HTTPClient.backoff(attempt)
+
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return min(float(response.headers.get('Retry-After', '')), HTTPClient.MAX_RETRY_DELAY)
+        except ValueError:
+            return None
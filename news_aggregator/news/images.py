@@ -0,0 +1,243 @@
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import threading
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from PIL import Image, ImageOps
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .coalescing import SingleFlight
+
+
+class PublicAddressMixin:
+    """Connection that resolves its host once, checks the addresses and
+    connects to the checked one. TLS still uses the host name for SNI and
+    certificate checks, a DNS answer changed after the check is never used"""
+
+    def _new_conn(self):
+        self._dns_host = ImageProxy.public_address(self.host, self.port)
+        return super()._new_conn()
+
+
+class PublicHTTPConnection(PublicAddressMixin, HTTPConnection):
+    pass
+
+
+class PublicHTTPSConnection(PublicAddressMixin, HTTPSConnection):
+    pass
+
+
+class PublicHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = PublicHTTPConnection
+
+
+class PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = PublicHTTPSConnection
+
+
+class PublicAddressAdapter(HTTPAdapter):
+    """Transport adapter that only opens connections to public addresses"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': PublicHTTPConnectionPool,
+            'https': PublicHTTPSConnectionPool,
+        }
+
+
+class ImageProxy:
+    """Resized copies of publisher images kept in a local disk cache.
+
+    Templates link images through signed proxy URLs (the `proxied` filter), so
+    only images rendered by the site can be fetched. Each image is downloaded
+    once per size, shrunk to one of NEWS_IMAGE_SIZES and re-encoded as WebP.
+    The directory is trimmed to NEWS_IMAGE_CACHE_MAX_BYTES, least recently used
+    files first (hits refresh the file mtime). Images that fail to load are
+    remembered for NEWS_IMAGE_NEGATIVE_TTL and are not fetched meanwhile.
+
+    Image URLs may come from users (saved articles), so only public http(s)
+    addresses are fetched. The address is checked when each connection is
+    opened, including connections of redirect hops, and the connection goes to
+    the checked address. Downloads use a session without retries and
+    environment proxies: a dead image is not worth holding a request thread for.
+    """
+    SALT = 'news.images'
+    DEAD_KEY_PREFIX = 'news:image:dead:'
+    CONTENT_TYPE = 'image/webp'
+
+    flight = SingleFlight('images')
+    _lock = threading.Lock()
+    _cache_bytes = None
+    _session = None
+
+    @classmethod
+    def sign(cls, url):
+        return signing.dumps(url, salt=cls.SALT, compress=True)
+
+    @classmethod
+    def unsign(cls, token):
+        """Returns image URL of a proxy token, or None if the token was not issued by the site"""
+        try:
+            return signing.loads(token, salt=cls.SALT)
+        except signing.BadSignature:
+            return None
+
+    @classmethod
+    def open(cls, url, size):
+        """Returns resized image opened for reading, or None if the image cannot be loaded"""
+        path = cls.path(url, size)
+        try:
+            os.utime(path)
+            return open(path, 'rb')
+        except FileNotFoundError:
+            pass
+
+        if cache.get(cls.DEAD_KEY_PREFIX + cls._hash(url)):
+            return None
+        if not cls.flight.do(str(path), lambda: cls._build(url, size, path)):
+            return None
+        return open(path, 'rb')
+
+    @classmethod
+    def session(cls):
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    session.trust_env = False
+                    adapter = PublicAddressAdapter()
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def path(cls, url, size):
+        digest = cls._hash(url)
+        return Path(settings.NEWS_IMAGE_CACHE_DIR) / digest[:2] / f'{digest}-{size}.webp'
+
+    @classmethod
+    def _build(cls, url, size, path):
+        if path.exists():
+            return True
+        try:
+            image = Image.open(io.BytesIO(cls._download(url)))
+            if image.format == 'JPEG':
+                # Decodes large photos at 1/2 to 1/8 scale. Square box, EXIF rotation may swap the sides
+                side = max(settings.NEWS_IMAGE_SIZES[size])
+                image.draft('RGB', (side, side))
+            if image.width * image.height > settings.NEWS_IMAGE_MAX_PIXELS:
+                raise ValueError(f'image is too large ({image.width}x{image.height})')
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(settings.NEWS_IMAGE_SIZES[size])
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            output = io.BytesIO()
+            image.save(output, 'WEBP', quality=settings.NEWS_IMAGE_QUALITY)
+        except (requests.exceptions.RequestException, OSError, ValueError, Image.DecompressionBombError) as e:
+            print(f'Error loading image {url}: {e}')
+            cache.set(cls.DEAD_KEY_PREFIX + cls._hash(url), True, timeout=settings.NEWS_IMAGE_NEGATIVE_TTL)
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+        temporary.write_bytes(output.getvalue())
+        os.replace(temporary, path)
+        cls._account(output.tell())
+        return True
+
+    @classmethod
+    def _download(cls, url):
+        """Reads image body, following up to NEWS_IMAGE_MAX_REDIRECTS redirects. Raises
+        ValueError for URLs that are not http(s) or not public, non-images and bodies
+        over NEWS_IMAGE_MAX_SOURCE_BYTES"""
+        limit = settings.NEWS_IMAGE_MAX_SOURCE_BYTES
+        for _redirect in range(settings.NEWS_IMAGE_MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise ValueError('not an http(s) URL')
+            with cls.session().get(
+                url, stream=True, allow_redirects=False, timeout=settings.NEWS_IMAGE_FETCH_TIMEOUT
+            ) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['Location'])
+                    continue
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if not content_type.startswith('image/'):
+                    raise ValueError(f"not an image ({content_type or 'no Content-Type'})")
+                if int(response.headers.get('Content-Length') or 0) > limit:
+                    raise ValueError('image is too large')
+
+                body = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    body += chunk
+                    if len(body) > limit:
+                        raise ValueError('image is too large')
+                return bytes(body)
+        raise ValueError('too many redirects')
+
+    @staticmethod
+    def public_address(host, port):
+        """Resolves host and returns its first address. Raises ValueError unless every address is public"""
+        addresses = [sockaddr[0] for *_, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+        for raw in addresses:
+            address = ipaddress.ip_address(raw.split('%')[0])
+            if address.version == 6 and address.ipv4_mapped:
+                address = address.ipv4_mapped
+            if not address.is_global or address.is_multicast:
+                raise ValueError(f'{host} is not a public address')
+        return addresses[0]
+
+    @classmethod
+    def _account(cls, added):
+        """Adds written bytes to the cache size and evicts least recently used files over the limit"""
+        with cls._lock:
+            if cls._cache_bytes is None:
+                cls._cache_bytes = sum(size for _path, _mtime, size in cls._files())
+            else:
+                cls._cache_bytes += added
+            if cls._cache_bytes <= settings.NEWS_IMAGE_CACHE_MAX_BYTES:
+                return
+
+            # Trimmed to 90% of the limit, so eviction does not run on every write
+            target = settings.NEWS_IMAGE_CACHE_MAX_BYTES * 0.9
+            files = sorted(cls._files(), key=lambda file: file[1])
+            total = sum(size for _path, _mtime, size in files)
+            for path, _mtime, size in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            cls._cache_bytes = total
+
+    @staticmethod
+    def _files():
+        for directory, _subdirectories, names in os.walk(settings.NEWS_IMAGE_CACHE_DIR):
+            for name in names:
+                if not name.endswith('.webp'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    @staticmethod
+    def _hash(url):
+        return hashlib.sha256(url.encode()).hexdigest()
@@ -0,0 +1,174 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Max, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from . import pipeline
+from .dedup import minhash, stories, story_text
+from .models import NewsArticle, url_digest
+from .services import NewsAPIService, CATEGORIES, SOURCES
+
+
+class IngestionService:
+    """Materializes NewsAPI feeds into the local article store"""
+    FEED_VERSION_KEY = 'news:feed_version'
+    STORED_FIELDS = [
+        'title', 'description', 'content', 'url', 'image_url',
+        'source', 'source_id', 'category', 'published_at',
+    ]
+
+    @classmethod
+    def ingest_all(cls, page_size=None):
+        """Fetches every category and source feed. Returns number of stored articles"""
+        page_size = page_size or settings.NEWS_INGEST_PAGE_SIZE
+        cls.warm_stories()
+        stored = 0
+
+        for code, _name in CATEGORIES:
+            articles = NewsAPIService.stream_top_headlines(category=code, page_size=page_size)
+            stored += cls.store(articles, category=code)
+
+        for code, _name in SOURCES:
+            articles = NewsAPIService.stream_top_headlines(source=code, page_size=page_size)
+            stored += cls.store(articles, source_id=code)
+
+        cache.delete(cls.FEED_VERSION_KEY)
+        return stored
+
+    @classmethod
+    async def afeed_version(cls):
+        """Time of the newest stored article as a timestamp, 0 for an empty store.
+        It comes from the database, so every process sees the last ingestion"""
+        version = await cache.aget(cls.FEED_VERSION_KEY)
+        if version is None:
+            fetched_at = (await NewsArticle.objects.aaggregate(fetched_at=Max('fetched_at')))['fetched_at']
+            version = fetched_at.timestamp() if fetched_at else 0
+            await cache.aset(cls.FEED_VERSION_KEY, version, timeout=settings.NEWS_FEED_VERSION_TTL)
+        return version
+
+    @classmethod
+    def warm_stories(cls):
+        """Loads stories of articles fetched within NEWS_INGEST_MAX_AGE into the
+        near-duplicate index, once per process. Returns number of loaded articles"""
+        if stories.warmed:
+            return 0
+        stories.warmed = True
+        since = timezone.now() - timedelta(seconds=settings.NEWS_INGEST_MAX_AGE)
+        rows = list(
+            NewsArticle.objects.filter(fetched_at__gte=since, story__isnull=False)
+            .order_by('-fetched_at')
+            .values('title', 'description', 'source', 'story')[:settings.NEWS_DEDUP_INDEX_SIZE]
+        )
+        known = ((minhash(story_text(row)), row['story']) for row in reversed(rows))
+        return stories.warm((signature, story) for signature, story in known if signature)
+
+    @classmethod
+    def store(cls, articles, category='', source_id=''):
+        """Upserts processed articles by URL, consuming them in batches"""
+        stored = 0
+        for batch in pipeline.batched(articles, settings.NEWS_INGEST_BATCH_SIZE):
+            stored += cls._upsert(batch, category, source_id)
+        return stored
+
+    @classmethod
+    def _upsert(cls, articles, category, source_id):
+        now = timezone.now()
+        rows = {}
+        for article in articles:
+            if not article.get('url'):
+                continue
+            rows[article['url']] = NewsArticle(
+                title=article['title'][:500],
+                description=article.get('description') or '',
+                content=article.get('content') or '',
+                url=article['url'],
+                image_url=article.get('image_url') or None,
+                source=article.get('source') or '',
+                source_id=source_id or article.get('source_id') or '',
+                category=category,
+                published_at=article.get('published_at'),
+                fetched_at=now,
+                story=article.get('story'),
+            )
+
+        if not rows:
+            return 0
+
+        # Stored stories are kept, a process with a cold index may cluster a repeat differently
+        update_fields = ['title', 'description', 'content', 'image_url', 'source', 'source_id',
+                         'published_at', 'fetched_at']
+        # Source feeds do not know the category, so they must not erase it
+        if category:
+            update_fields.append('category')
+
+        with transaction.atomic():
+            NewsArticle.objects.bulk_create(
+                list(rows.values()),
+                update_conflicts=True,
+                unique_fields=['url_hash'],
+                update_fields=update_fields,
+            )
+            cls._fill_stories(rows)
+        return len(rows)
+
+    @classmethod
+    def _fill_stories(cls, rows):
+        """Sets story of stored articles that have none yet"""
+        missing = NewsArticle.objects.filter(
+            url_hash__in=[url_digest(url) for url, row in rows.items() if row.story is not None],
+            story__isnull=True,
+        ).values_list('pk', 'url')
+        NewsArticle.objects.bulk_update(
+            [NewsArticle(pk=pk, story=rows[url].story) for pk, url in missing], ['story']
+        )
+
+    @classmethod
+    def stored_feed(cls, category=None, source=None, page=1, page_size=20):
+        """Returns page of fresh stored articles or None if the store cannot serve the feed"""
+        return cls._feed_page(list(cls._feed_queryset(category, source, page, page_size)))
+
+    @classmethod
+    async def astored_feed(cls, category=None, source=None, page=1, page_size=20):
+        """Async version of stored_feed"""
+        return cls._feed_page([row async for row in cls._feed_queryset(category, source, page, page_size)])
+
+    @classmethod
+    def _feed_queryset(cls, category, source, page, page_size):
+        try:
+            page = max(int(page), 1)
+        except (TypeError, ValueError):
+            page = 1
+
+        cutoff = timezone.now() - timedelta(seconds=settings.NEWS_INGEST_MAX_AGE)
+        articles = NewsArticle.objects.filter(fetched_at__gte=cutoff)
+
+        if source:
+            articles = articles.filter(source_id=source)
+        elif category:
+            articles = articles.filter(category=category)
+        else:
+            articles = articles.exclude(category='')
+
+        # One article per story, the newest of its near-duplicates from other sources
+        newest_first = [F('published_at').desc(nulls_last=True), F('id').desc()]
+        articles = articles.annotate(story_rank=Window(
+            RowNumber(),
+            partition_by=[F('story'), Case(When(story__isnull=True, then=F('id')))],
+            order_by=newest_first,
+        )).filter(story_rank=1)
+
+        offset = (page - 1) * page_size
+        return articles.order_by(*newest_first).values(*cls.STORED_FIELDS)[offset:offset + page_size]
+
+    @classmethod
+    def _feed_page(cls, rows):
+        if not rows:
+            return None
+
+        for row in rows:
+            row['image_url'] = row['image_url'] or ''
+        return rows
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.orphans import OrphanCollector
+
+
+class Command(BaseCommand):
+    help = 'Deletes articles that are not saved by any user and are not fresh headlines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=settings.NEWS_ORPHAN_INTERVAL,
+            help='Seconds between collections',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NEWS_ORPHAN_BATCH_SIZE,
+            help='Articles deleted per transaction',
+        )
+        parser.add_argument(
+            '--candidates-only', action='store_true',
+            help='Only check articles whose saves were removed since the last run',
+        )
+        parser.add_argument('--once', action='store_true', help='Collect once and exit')
+
+    def handle(self, *args, **options):
+        collect = OrphanCollector.collect_candidates if options['candidates_only'] else OrphanCollector.collect
+        while True:
+            started = time.monotonic()
+            deleted = collect(batch_size=options['batch_size'])
+            self.stdout.write(f'Deleted {deleted} orphaned articles in {time.monotonic() - started:.1f}s')
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.ingestion import IngestionService
+from news.orphans import OrphanCollector
+
+
+class Command(BaseCommand):
+    help = 'Periodically stores headlines of every category and source feed in the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=settings.NEWS_INGEST_INTERVAL,
+            help='Seconds between ingestion runs',
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=settings.NEWS_INGEST_PAGE_SIZE,
+            help='Articles requested per feed',
+        )
+        parser.add_argument('--once', action='store_true', help='Run a single ingestion and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            stored = IngestionService.ingest_all(page_size=options['page_size'])
+            pruned = OrphanCollector.collect()
+            self.stdout.write(
+                f'Stored {stored} articles, pruned {pruned} in {time.monotonic() - started:.1f}s'
+            )
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from news.health import HealthMonitor
+
+
+class Command(BaseCommand):
+    help = 'Periodically probes external APIs and stores their health for the admin panel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=settings.HEALTH_CHECK_INTERVAL,
+            help='Seconds between probes',
+        )
+        parser.add_argument('--once', action='store_true', help='Probe once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            snapshot = HealthMonitor.run()
+            HealthMonitor.prune()
+            for api in snapshot['apis']:
+                self.stdout.write(f"{api['name']}: {api['status']} p95={api['p95_ms']}ms")
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
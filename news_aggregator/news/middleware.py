@@ -1,21 +1,42 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.utils import translation
 from django.conf import settings
 
 
 class TranslationMiddleware:
+    """Activates language from the language cookie. The session is not touched,
+    so anonymous requests do not load or write one"""
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        language = request.session.get('django_language')
-        if not language:
-            language = request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME, 'en')
+        if self.async_mode:
+            return self.__acall__(request)
 
-        translation.activate(language)
-        request.LANGUAGE_CODE = language
+        self.activate(request)
 
         response = self.get_response(request)
         translation.deactivate()
 
         return response
+
+    async def __acall__(self, request):
+        self.activate(request)
+
+        response = await self.get_response(request)
+        translation.deactivate()
+
+        return response
+
+    @staticmethod
+    def activate(request):
+        language = request.COOKIES.get(settings.LANGUAGE_COOKIE_NAME, 'en')
+
+        translation.activate(language)
+        request.LANGUAGE_CODE = language
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_alter_newsarticle_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='category',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Категорія'),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='fetched_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата завантаження'),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата публікації'),
+        ),
+        migrations.AddField(
+            model_name='newsarticle',
+            name='source_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Ідентифікатор джерела'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['category', '-published_at'], name='news_category_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['source_id', '-published_at'], name='news_source_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['fetched_at'], name='news_fetched_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_newsarticle_feed_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Translation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64, verbose_name='Хеш тексту')),
+                ('source_lang', models.CharField(max_length=10, verbose_name='Мова оригіналу')),
+                ('target_lang', models.CharField(max_length=10, verbose_name='Мова перекладу')),
+                ('translated_text', models.TextField(verbose_name='Переклад')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата перекладу')),
+            ],
+            options={
+                'verbose_name': 'Переклад',
+                'verbose_name_plural': 'Переклади',
+                'unique_together': {('text_hash', 'source_lang', 'target_lang')},
+            },
+        ),
+    ]
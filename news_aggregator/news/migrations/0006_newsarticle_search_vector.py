@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_CONFIG = 'pg_catalog.english'
+
+SEARCH_VECTOR_SQL = f"""
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}title, '')), 'A') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}description, '')), 'B') ||
+    setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}content, '')), 'C')
+"""
+
+FORWARD_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION news_newsarticle_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER news_newsarticle_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description, content ON news_newsarticle
+    FOR EACH ROW EXECUTE FUNCTION news_newsarticle_search_vector_update();
+    """,
+    f"UPDATE news_newsarticle SET search_vector = {SEARCH_VECTOR_SQL.format(row='')};",
+    "CREATE INDEX news_search_vector_idx ON news_newsarticle USING gin (search_vector);",
+]
+
+BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS news_search_vector_idx;",
+    "DROP TRIGGER IF EXISTS news_newsarticle_search_vector_trigger ON news_newsarticle;",
+    "DROP FUNCTION IF EXISTS news_newsarticle_search_vector_update();",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # Full-text search exists on PostgreSQL only, other backends search with icontains
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_translation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='newsarticle',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='news_search_vector_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(_run(FORWARD_SQL), _run(BACKWARD_SQL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_newsarticle_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIHealthCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('api', models.CharField(max_length=50, verbose_name='API')),
+                ('ok', models.BooleanField(verbose_name='Доступний')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Код відповіді')),
+                ('latency_ms', models.FloatField(blank=True, null=True, verbose_name='Затримка, мс')),
+                ('error', models.CharField(blank=True, max_length=255, verbose_name='Помилка')),
+                ('checked_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата перевірки')),
+            ],
+            options={
+                'verbose_name': 'Перевірка API',
+                'verbose_name_plural': 'Перевірки API',
+                'ordering': ['-checked_at'],
+                'indexes': [models.Index(fields=['api', '-checked_at'], name='news_health_api_checked_idx')],
+            },
+        ),
+    ]
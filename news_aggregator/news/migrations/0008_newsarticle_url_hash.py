@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:40
+
+import hashlib
+
+from django.db import migrations
+import news.models
+
+
+def backfill_url_hash(apps, schema_editor):
+    NewsArticle = apps.get_model('news', 'NewsArticle')
+    batch = []
+    for article in NewsArticle.objects.only('id', 'url').iterator(chunk_size=2000):
+        article.url_hash = hashlib.sha256((article.url or '').encode('utf-8')).hexdigest()
+        batch.append(article)
+        if len(batch) == 2000:
+            NewsArticle.objects.bulk_update(batch, ['url_hash'])
+            batch = []
+    NewsArticle.objects.bulk_update(batch, ['url_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_apihealthcheck'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='url_hash',
+            field=news.models.URLHashField(null=True, verbose_name='Хеш URL'),
+        ),
+        migrations.RunPython(backfill_url_hash, migrations.RunPython.noop),
+    ]
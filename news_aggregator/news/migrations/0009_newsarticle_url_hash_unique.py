@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+import news.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('news', '0008_newsarticle_url_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newsarticle',
+            name='url_hash',
+            field=news.models.URLHashField(unique=True, verbose_name='Хеш URL'),
+        ),
+        migrations.AlterField(
+            model_name='newsarticle',
+            name='url',
+            field=models.URLField(max_length=1000, verbose_name='URL'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['source'], name='news_source_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedarticle',
+            index=models.Index(fields=['user', '-saved_at'], name='news_saved_user_saved_at_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:24
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_article_facets(apps, schema_editor):
+    NewsArticle = apps.get_model('news', 'NewsArticle')
+    SavedArticle = apps.get_model('news', 'SavedArticle')
+    article = NewsArticle.objects.filter(pk=OuterRef('article_id'))
+    SavedArticle.objects.update(
+        category=Subquery(article.values('category')[:1]),
+        source_id=Subquery(article.values('source_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_newsarticle_url_hash_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedarticle',
+            name='category',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Категорія'),
+        ),
+        migrations.AddField(
+            model_name='savedarticle',
+            name='source_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Ідентифікатор джерела'),
+        ),
+        migrations.RunPython(copy_article_facets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='savedarticle',
+            index=models.Index(fields=['user', 'category', '-saved_at'], name='news_saved_user_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedarticle',
+            index=models.Index(fields=['user', 'source_id', '-saved_at'], name='news_saved_user_source_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_savedarticle_facets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='story',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='Сюжет'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_newsarticle_story'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='orphan_candidate',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Кандидат на видалення'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(condition=models.Q(('orphan_candidate', True)), fields=['id'], name='news_orphan_candidate_idx'),
+        ),
+    ]
@@ -1,15 +1,64 @@
+import hashlib
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
 
+def url_digest(url):
+    """Fixed-width lookup key of an article URL"""
+    return hashlib.sha256((url or '').encode('utf-8')).hexdigest()
+
+
+ARTICLE_ID_LENGTH = 16
+
+
+def article_id(url):
+    """Short public id of an article used in links, a prefix of its URL hash"""
+    return url_digest(url)[:ARTICLE_ID_LENGTH]
+
+
+class URLHashField(models.CharField):
+    """SHA-256 digest of the url field, computed on every save including bulk_create.
+    QuerySet.update(url=...) does not recompute it"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['max_length'] = 64
+        kwargs['editable'] = False
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        del kwargs['max_length']
+        del kwargs['editable']
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = url_digest(model_instance.url)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
 class NewsArticle(models.Model):
-    """News article model. It only contains articles that have been saved by users."""
+    """News article model. It contains articles saved by users and headlines stored by the ingestion worker."""
     title = models.CharField(max_length=500, verbose_name='Заголовок')
     description = models.TextField(blank=True, verbose_name='Опис')
     content = models.TextField(blank=True, verbose_name='Вміст')
-    url = models.URLField(max_length=1000, unique=True, verbose_name='URL')
+    url = models.URLField(max_length=1000, verbose_name='URL')
+    url_hash = URLHashField(unique=True, verbose_name='Хеш URL')
     image_url = models.URLField(max_length=1000, blank=True, null=True, verbose_name='URL зображення')
     source = models.CharField(max_length=200, blank=True, verbose_name='Джерело')
+    source_id = models.CharField(max_length=100, blank=True, verbose_name='Ідентифікатор джерела')
+    category = models.CharField(max_length=50, blank=True, verbose_name='Категорія')
+    published_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата публікації')
+    fetched_at = models.DateTimeField(blank=True, null=True, verbose_name='Дата завантаження')
+    # Near-duplicate cluster (news.dedup), articles of one story from several sources share it
+    story = models.BigIntegerField(blank=True, null=True, editable=False, verbose_name='Сюжет')
+    # Set when a save of the article is removed, news.orphans checks these first
+    orphan_candidate = models.BooleanField(default=False, editable=False, verbose_name='Кандидат на видалення')
+    # Maintained by a PostgreSQL trigger from title, description and content
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата додавання')
 
     saved_by = models.ManyToManyField(
@@ -23,10 +72,22 @@ class NewsArticle(models.Model):
         verbose_name = 'Новина'
         verbose_name_plural = 'Новини'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', '-published_at'], name='news_category_published_idx'),
+            models.Index(fields=['source_id', '-published_at'], name='news_source_published_idx'),
+            models.Index(fields=['fetched_at'], name='news_fetched_idx'),
+            models.Index(fields=['source'], name='news_source_idx'),
+            GinIndex(fields=['search_vector'], name='news_search_vector_idx'),
+            models.Index(fields=['id'], condition=models.Q(orphan_candidate=True), name='news_orphan_candidate_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def short_id(self):
+        return self.url_hash[:ARTICLE_ID_LENGTH]
+
 
 class SavedArticle(models.Model):
     user = models.ForeignKey(
@@ -39,6 +100,9 @@ class SavedArticle(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Новина'
     )
+    # Feed context at save time, copied here so read later filters and facets do not join articles
+    category = models.CharField(max_length=50, blank=True, verbose_name='Категорія')
+    source_id = models.CharField(max_length=100, blank=True, verbose_name='Ідентифікатор джерела')
     saved_at = models.DateTimeField(auto_now_add=True, verbose_name='Збережено')
 
     class Meta:
@@ -46,6 +110,49 @@ class SavedArticle(models.Model):
         verbose_name_plural = 'Збережені новини'
         unique_together = ['user', 'article']
         ordering = ['-saved_at']
+        indexes = [
+            models.Index(fields=['user', '-saved_at'], name='news_saved_user_saved_at_idx'),
+            models.Index(fields=['user', 'category', '-saved_at'], name='news_saved_user_category_idx'),
+            models.Index(fields=['user', 'source_id', '-saved_at'], name='news_saved_user_source_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.article.title[:50]}'
+
+
+class Translation(models.Model):
+    """Translated text of an article field, keyed by hash of the original text"""
+    text_hash = models.CharField(max_length=64, verbose_name='Хеш тексту')
+    source_lang = models.CharField(max_length=10, verbose_name='Мова оригіналу')
+    target_lang = models.CharField(max_length=10, verbose_name='Мова перекладу')
+    translated_text = models.TextField(verbose_name='Переклад')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата перекладу')
+
+    class Meta:
+        verbose_name = 'Переклад'
+        verbose_name_plural = 'Переклади'
+        unique_together = ['text_hash', 'source_lang', 'target_lang']
+
+    def __str__(self):
+        return f'{self.text_hash[:12]} {self.source_lang} -> {self.target_lang}'
+
+
+class APIHealthCheck(models.Model):
+    """Result of one scheduled probe of an external API (manage.py monitor_apis)"""
+    api = models.CharField(max_length=50, verbose_name='API')
+    ok = models.BooleanField(verbose_name='Доступний')
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Код відповіді')
+    latency_ms = models.FloatField(blank=True, null=True, verbose_name='Затримка, мс')
+    error = models.CharField(max_length=255, blank=True, verbose_name='Помилка')
+    checked_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата перевірки')
+
+    class Meta:
+        verbose_name = 'Перевірка API'
+        verbose_name_plural = 'Перевірки API'
+        ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['api', '-checked_at'], name='news_health_api_checked_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.api} {self.status_code or self.error} ({self.checked_at})'
@@ -0,0 +1,78 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NewsArticle
+
+
+class OrphanCollector:
+    """Deletes articles nobody has saved with set-based queries.
+
+    Removing a save only marks its article as a candidate. Candidates are
+    buffered per thread and flagged in the database with one UPDATE per
+    committed transaction, so bulk deletes and cascades do not query per row
+    and every process sees them. collect() deletes candidates first and then
+    sweeps the whole table with a batched anti-join.
+    """
+    _pending = threading.local()
+
+    @classmethod
+    def mark(cls, article_id):
+        """Records article as a possible orphan after the current transaction commits"""
+        pending = getattr(cls._pending, 'ids', None)
+        if pending is None:
+            pending = cls._pending.ids = set()
+        pending.add(article_id)
+        # Registered for every row, but only the first callback finds anything to flush
+        transaction.on_commit(cls._flush)
+
+    @classmethod
+    def orphans(cls):
+        """Unsaved articles past their grace period (user saves) or retention (ingested headlines)"""
+        now = timezone.now()
+        saved_cutoff = now - timedelta(seconds=settings.NEWS_ORPHAN_GRACE)
+        ingested_cutoff = now - timedelta(seconds=settings.NEWS_INGEST_RETENTION)
+        return NewsArticle.objects.filter(
+            Q(fetched_at__isnull=True, created_at__lt=saved_cutoff) | Q(fetched_at__lt=ingested_cutoff),
+            savedarticle__isnull=True,
+        )
+
+    @classmethod
+    def collect(cls, batch_size=None):
+        """Deletes marked candidates, then every other orphan. Returns number of deleted articles"""
+        return cls.collect_candidates(batch_size) + cls._delete_in_batches(cls.orphans(), batch_size)
+
+    @classmethod
+    def collect_candidates(cls, batch_size=None):
+        """Deletes only articles marked since the last run"""
+        deleted = cls._delete_in_batches(cls.orphans().filter(orphan_candidate=True), batch_size)
+        # Saved again meanwhile. Candidates still in their grace period stay for the next run
+        NewsArticle.objects.filter(orphan_candidate=True, savedarticle__isnull=False).update(orphan_candidate=False)
+        return deleted
+
+    @classmethod
+    def _delete_in_batches(cls, orphans, batch_size):
+        batch_size = batch_size or settings.NEWS_ORPHAN_BATCH_SIZE
+        deleted = 0
+        while True:
+            ids = list(orphans.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                # Re-checked inside the delete in case an article was saved meanwhile
+                count, _ = cls.orphans().filter(id__in=ids).only('id').delete()
+            deleted += count
+            if len(ids) < batch_size:
+                return deleted
+
+    @classmethod
+    def _flush(cls):
+        pending = getattr(cls._pending, 'ids', None)
+        if not pending:
+            return
+        cls._pending.ids = None
+        NewsArticle.objects.filter(id__in=pending, orphan_candidate=False).update(orphan_candidate=True)
@@ -0,0 +1,92 @@
+import functools
+import hashlib
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .ingestion import IngestionService
+
+CSRF_PLACEHOLDER = b'__page_cache_csrf_token__'
+CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+class AnonymousPageCache:
+    """Rendered pages shared by all guests (see cache_anonymous_page).
+
+    Pages are keyed by interface language, normalized query parameters and the
+    feed version, which is the time of the last ingestion, so a refreshed feed
+    hits old pages for at most NEWS_FEED_VERSION_TTL seconds. Guest CSRF tokens
+    are stored as a placeholder and the token of the current visitor is put
+    back on every hit. Validators of the
+    page are stored with it, so hits answer conditional requests with 304.
+    """
+    KEY_PREFIX = 'news:page:'
+
+    @classmethod
+    async def aget(cls, key, request):
+        page = await cache.aget(key)
+        if page is None:
+            return None
+        content, content_type, headers = page
+        token = get_token(request).encode()
+        response = HttpResponse(content.replace(CSRF_PLACEHOLDER, token), content_type=content_type, headers=headers)
+
+        etag = response.get('ETag')
+        last_modified = parse_http_date_safe(response.get('Last-Modified', ''))
+        if etag or last_modified:
+            return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+        return response
+
+    @classmethod
+    async def aset(cls, key, response):
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return
+        content = CSRF_INPUT.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+        headers = {header: response[header] for header in STORED_HEADERS if response.has_header(header)}
+        await cache.aset(key, (content, response['Content-Type'], headers), timeout=settings.NEWS_PAGE_CACHE_TTL)
+
+    @classmethod
+    async def akey(cls, request, params):
+        """Cache key of the page. Unknown and empty parameters, their order and page=1 do not change it"""
+        version = await IngestionService.afeed_version()
+        query = sorted(
+            (param, value) for param in params
+            if (value := request.GET.get(param, '')) and not (param == 'page' and value == '1')
+        )
+        raw = f'{request.path}|{request.LANGUAGE_CODE}|{version}|{query}'
+        return cls.KEY_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+    @staticmethod
+    def is_guest_request(request):
+        """Anonymous GET without pending messages, which would be rendered into the page"""
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        return not request.user.is_authenticated and not len(get_messages(request))
+
+
+def cache_anonymous_page(*params):
+    """Serves guests a cached page before the view runs. `params` are the query
+    parameters the view reads, others are not part of the key. Pages of
+    logged-in users are never cached"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if not await sync_to_async(AnonymousPageCache.is_guest_request)(request):
+                return await view(request, *args, **kwargs)
+
+            key = await AnonymousPageCache.akey(request, params)
+            response = await AnonymousPageCache.aget(key, request)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                await AnonymousPageCache.aset(key, response)
+            return response
+        return wrapper
+    return decorator
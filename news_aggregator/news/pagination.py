@@ -0,0 +1,105 @@
+import math
+
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPage:
+    def __init__(self, object_list, number, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.number = number
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = None
+        self.count_capped = False
+        self.num_pages = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+
+class KeysetPaginator:
+    """Pages a queryset ordered by (datetime `field` desc, id desc) with opaque cursor tokens.
+
+    Every page is a range scan starting after the cursor row, so page N costs the
+    same as page 1 instead of COUNT(*) and OFFSET. `count_cap` adds an approximate
+    total that counts at most that many rows.
+    """
+    SALT = 'news.pagination'
+
+    def __init__(self, queryset, per_page, field, count_cap=0):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.count_cap = count_cap
+
+    def get_page(self, cursor=None):
+        """Returns page after/before the cursor row, or the first page if cursor is missing or invalid"""
+        position = self._decode(cursor)
+        if position is None:
+            rows = list(self._ordered(descending=True)[:self.per_page + 1])
+            page = self._page(rows[:self.per_page], 1, len(rows) > self.per_page, False)
+        else:
+            value, pk, backwards, number = position
+            if backwards:
+                after = Q(**{f'{self.field}__gt': value}) | Q(**{self.field: value, 'pk__gt': pk})
+                rows = list(self._ordered(descending=False).filter(after)[:self.per_page + 1])
+                has_previous = len(rows) > self.per_page
+                rows = rows[:self.per_page][::-1]
+                page = self._page(rows, number, True, has_previous)
+            else:
+                before = Q(**{f'{self.field}__lt': value}) | Q(**{self.field: value, 'pk__lt': pk})
+                rows = list(self._ordered(descending=True).filter(before)[:self.per_page + 1])
+                page = self._page(rows[:self.per_page], number, len(rows) > self.per_page, True)
+
+        if self.count_cap:
+            page.count = self.queryset[:self.count_cap].count()
+            page.count_capped = page.count == self.count_cap
+            page.num_pages = max(math.ceil(page.count / self.per_page), 1)
+        return page
+
+    def _ordered(self, descending):
+        prefix = '-' if descending else ''
+        return self.queryset.order_by(f'{prefix}{self.field}', f'{prefix}pk')
+
+    def _page(self, rows, number, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self._encode(rows[-1], False, number + 1)
+        if rows and has_previous:
+            previous_cursor = self._encode(rows[0], True, number - 1)
+        return KeysetPage(rows, number, has_next, has_previous, next_cursor, previous_cursor)
+
+    def _encode(self, row, backwards, number):
+        value = getattr(row, self.field)
+        return signing.dumps([value.isoformat(), row.pk, int(backwards), number], salt=self.SALT, compress=True)
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None
+        try:
+            value, pk, backwards, number = signing.loads(cursor, salt=self.SALT)
+        except (signing.BadSignature, TypeError, ValueError):
+            return None
+        value = parse_datetime(value)
+        if value is None:
+            return None
+        return value, pk, bool(backwards), max(int(number), 1)
@@ -0,0 +1,84 @@
+"""
+Lazy article processing pipeline.
+
+Every stage takes an iterable of articles and yields articles, so stages can
+be composed and articles flow through them one at a time:
+
+    for article in process(payload['articles']):
+        ...
+"""
+from django.utils.dateparse import parse_datetime
+
+from .cleaning import content_cleaner
+from .dedup import minhash, stories, story_text
+
+
+def drop_removed(articles):
+    """Skips articles without title or taken down by the publisher"""
+    for article in articles:
+        title = article.get('title')
+        if title and title != '[Removed]':
+            yield article
+
+
+def clean(articles):
+    """Cleans content of raw NewsAPI articles"""
+    for article in articles:
+        yield dict(article, content=content_cleaner.clean(article.get('content', '')))
+
+
+def validate(articles):
+    """Skips articles with neither content nor description"""
+    for article in articles:
+        if article['content'] or article.get('description', ''):
+            yield article
+
+
+def normalize(articles):
+    """Converts raw NewsAPI articles to the format used by views and storage"""
+    for article in articles:
+        source = article.get('source') or {}
+        yield {
+            'title': article.get('title', ''),
+            'description': article.get('description', ''),
+            'content': article['content'],
+            'url': article.get('url', ''),
+            'image_url': article.get('urlToImage', ''),
+            'source': source.get('name', ''),
+            'source_id': source.get('id') or '',
+            'published_at': parse_datetime(article.get('publishedAt') or ''),
+        }
+
+
+def deduplicate(articles, index=stories):
+    """Adds 'story', the id of the article's near-duplicate cluster, and skips
+    repeats of a story earlier in the same stream"""
+    seen = set()
+    for article in articles:
+        signature = minhash(story_text(article))
+        story = index.cluster(signature) if signature else None
+        if story is None or story not in seen:
+            seen.add(story)
+            yield dict(article, story=story)
+
+
+STAGES = [drop_removed, clean, validate, normalize, deduplicate]
+
+
+def process(articles, stages=STAGES):
+    """Returns generator of processed articles"""
+    for stage in stages:
+        articles = stage(articles)
+    return articles
+
+
+def batched(articles, size):
+    """Groups processed articles into lists of at most `size` items"""
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
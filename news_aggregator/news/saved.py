@@ -0,0 +1,168 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ARTICLE_ID_LENGTH, NewsArticle, SavedArticle, url_digest
+from .services import CATEGORIES
+
+validate_url = URLValidator(schemes=['http', 'https'])
+
+
+def saved_facets(user):
+    """Returns ({category: count}, {source_id: count}) of user's saves in one grouped query"""
+    categories, sources = {}, {}
+    rows = (
+        SavedArticle.objects.filter(user=user)
+        .values_list('category', 'source_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for category, source_id, count in rows:
+        categories[category] = categories.get(category, 0) + count
+        sources[source_id] = sources.get(source_id, 0) + count
+    return categories, sources
+
+
+def bulk_save(user, articles):
+    """Saves feed articles for the user with set-based inserts in one transaction.
+
+    Articles are dicts as posted by the feed. Returns (saved, already_saved, invalid)
+    with URLs of new saves, URLs the user had saved before and indexes of
+    articles that could not be read.
+    """
+    rows, invalid = {}, []
+    for index, data in enumerate(articles):
+        article = _news_article(data)
+        if article is None:
+            invalid.append(index)
+        else:
+            rows.setdefault(url_digest(article.url), (article, data))
+    if not rows:
+        return [], [], invalid
+
+    with transaction.atomic():
+        NewsArticle.objects.bulk_create([article for article, _data in rows.values()], ignore_conflicts=True)
+        stored = {
+            url_hash: (article_id, url, category, source_id)
+            for url_hash, article_id, url, category, source_id in NewsArticle.objects.filter(
+                url_hash__in=rows
+            ).values_list('url_hash', 'id', 'url', 'category', 'source_id')
+        }
+        saved_before = set(
+            SavedArticle.objects.filter(user=user, article_id__in=[row[0] for row in stored.values()])
+            .values_list('article_id', flat=True)
+        )
+
+        saves = []
+        for url_hash, (article_id, _url, category, source_id) in stored.items():
+            if article_id in saved_before:
+                continue
+            article, data = rows[url_hash]
+            saves.append(SavedArticle(
+                user=user,
+                article_id=article_id,
+                category=article.category or category,
+                source_id=article.source_id or source_id,
+            ))
+        SavedArticle.objects.bulk_create(saves, ignore_conflicts=True)
+
+    saved = [url for article_id, url, _category, _source_id in stored.values() if article_id not in saved_before]
+    already_saved = [url for article_id, url, _category, _source_id in stored.values() if article_id in saved_before]
+    SavedURLSet.invalidate(user.pk)
+    return saved, already_saved, invalid
+
+
+def _news_article(data):
+    """Unsaved NewsArticle from posted feed data, or None if it has no valid URL or title"""
+    if not isinstance(data, dict):
+        return None
+    url = str(data.get('url') or '')
+    title = str(data.get('title') or '').strip()
+    try:
+        validate_url(url)
+    except ValidationError:
+        return None
+    if not title or len(url) > 1000:
+        return None
+
+    image_url = str(data.get('image_url') or '')
+    try:
+        validate_url(image_url)
+    except ValidationError:
+        image_url = None
+    try:
+        published_at = parse_datetime(str(data.get('published_at') or ''))
+    except ValueError:
+        published_at = None
+    if published_at and timezone.is_naive(published_at):
+        published_at = timezone.make_aware(published_at)
+    category = str(data.get('category') or '')
+
+    return NewsArticle(
+        title=title[:500],
+        description=str(data.get('description') or ''),
+        content=str(data.get('content') or ''),
+        url=url,
+        image_url=image_url if image_url and len(image_url) <= 1000 else None,
+        source=str(data.get('source') or '')[:200],
+        source_id=str(data.get('source_id') or '')[:100],
+        category=category if category in dict(CATEGORIES) else '',
+        published_at=published_at,
+    )
+
+
+class SavedURLSet:
+    """Articles saved by one user as a cached set of article ids.
+
+    Supports `url in saved_urls` in templates with one cache read per page and
+    a hash lookup per article. Changes to the user's saves drop the cached set
+    (`invalidate`) and the next read rebuilds it from the database, so
+    concurrent saves and removals never overwrite each other's update.
+    """
+
+    def __init__(self, ids=()):
+        self.ids = frozenset(ids)
+
+    def __contains__(self, url):
+        return bool(url) and url_digest(url)[:ARTICLE_ID_LENGTH] in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def for_user(cls, user):
+        ids = cache.get(cls._key(user.pk))
+        if ids is None:
+            ids = {url_hash[:ARTICLE_ID_LENGTH] for url_hash in cls._url_hashes(user)}
+            cache.add(cls._key(user.pk), ids, timeout=settings.NEWS_SAVED_URLS_TTL)
+        return cls(ids)
+
+    @classmethod
+    async def afor_user(cls, user):
+        """Async version of for_user"""
+        ids = await cache.aget(cls._key(user.pk))
+        if ids is None:
+            ids = {url_hash[:ARTICLE_ID_LENGTH] async for url_hash in cls._url_hashes(user)}
+            await cache.aadd(cls._key(user.pk), ids, timeout=settings.NEWS_SAVED_URLS_TTL)
+        return cls(ids)
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """Drops the cached set now and again after the current transaction commits,
+        so a set rebuilt from data read before the commit does not survive it"""
+        key = cls._key(user_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @staticmethod
+    def _url_hashes(user):
+        return SavedArticle.objects.filter(user=user).values_list('article__url_hash', flat=True)
+
+    @staticmethod
+    def _key(user_id):
+        return f'news:saved_ids:{user_id}'
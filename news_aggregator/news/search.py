@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q
+
+from .ingestion import IngestionService
+from .models import NewsArticle
+
+# Must match the configuration used by the search_vector trigger (migration 0006)
+SEARCH_CONFIG = 'english'
+
+
+class LocalSearchService:
+    """Full-text search over stored articles.
+
+    On PostgreSQL matches are ranked against the trigger-maintained search_vector
+    (title > description > content). Other databases fall back to icontains.
+    """
+
+    @classmethod
+    def search(cls, query, page=1, page_size=20):
+        """Returns page of matching articles or None if too few are stored locally"""
+        return cls._results(list(cls._queryset(query, page, page_size)), page_size)
+
+    @classmethod
+    async def asearch(cls, query, page=1, page_size=20):
+        """Async version of search"""
+        return cls._results([row async for row in cls._queryset(query, page, page_size)], page_size)
+
+    @classmethod
+    def _queryset(cls, query, page, page_size):
+        try:
+            page = max(int(page), 1)
+        except (TypeError, ValueError):
+            page = 1
+
+        if connection.vendor == 'postgresql':
+            search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+            articles = (
+                NewsArticle.objects.filter(search_vector=search_query)
+                .annotate(rank=SearchRank(F('search_vector'), search_query))
+                .order_by('-rank', F('published_at').desc(nulls_last=True), '-id')
+            )
+        else:
+            articles = (
+                NewsArticle.objects.filter(
+                    Q(title__icontains=query) | Q(description__icontains=query) | Q(content__icontains=query)
+                )
+                .order_by(F('published_at').desc(nulls_last=True), '-id')
+            )
+
+        offset = (page - 1) * page_size
+        return articles.values(*IngestionService.STORED_FIELDS)[offset:offset + page_size]
+
+    @classmethod
+    def _results(cls, rows, page_size):
+        if len(rows) < min(settings.NEWS_SEARCH_MIN_RESULTS, page_size):
+            return None
+
+        for row in rows:
+            row['image_url'] = row['image_url'] or ''
+        return rows
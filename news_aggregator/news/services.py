@@ -1,18 +1,50 @@
-import requests
+import hashlib
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-import re
+from django.core.cache import cache
+
+from . import pipeline
+from .cleaning import content_cleaner
+from .coalescing import SingleFlight
+from .http_client import HTTPClient, AsyncHTTPClient
 
 
 class NewsAPIService:
     """NewsAPI Service designed to provide news articles from different sources"""
     BASE_URL = 'https://newsapi.org/v2'
+    CACHE_PREFIX = 'newsapi'
+    DEFAULT_CACHE_TTL = 300
+    DEFAULT_STALE_TTL = 3600
+    REFRESH_LOCK_TIMEOUT = 30
+    coalescer = SingleFlight('newsapi', cluster=getattr(settings, 'NEWS_API_CLUSTER_COALESCING', False))
 
     @classmethod
     def fetch_top_headlines(cls, category=None, source=None, page=1, page_size=20):
         """Отримання головних новин"""
-        url = f'{cls.BASE_URL}/top-headlines'
+        return cls._get_articles('top-headlines', cls._headlines_params(category, source, page, page_size))
+
+    @classmethod
+    def search_news(cls, query, page=1, page_size=20):
+        """Search news articles"""
+        return cls._get_articles('everything', cls._search_params(query, page, page_size))
+
+    @classmethod
+    async def afetch_top_headlines(cls, category=None, source=None, page=1, page_size=20):
+        """Async version of fetch_top_headlines"""
+        return await cls._aget_articles('top-headlines', cls._headlines_params(category, source, page, page_size))
+
+    @classmethod
+    async def asearch_news(cls, query, page=1, page_size=20):
+        """Async version of search_news"""
+        return await cls._aget_articles('everything', cls._search_params(query, page, page_size))
+
+    @classmethod
+    def _headlines_params(cls, category, source, page, page_size):
         params = {
-            'apiKey': settings.NEWS_API_KEY,
             'page': page,
             'pageSize': page_size,
         }
@@ -24,114 +56,229 @@ class NewsAPIService:
             if category:
                 params['category'] = category
 
-        try:
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return cls._process_articles(data.get('articles', []))
-            return []
-        except Exception as e:
-            print(f'Error fetching news: {e}')
-            return []
+        return params
 
     @classmethod
-    def search_news(cls, query, page=1, page_size=20):
-        """Search news articles"""
-        url = f'{cls.BASE_URL}/everything'
-        params = {
-            'apiKey': settings.NEWS_API_KEY,
+    def _search_params(cls, query, page, page_size):
+        return {
             'q': query,
             'page': page,
             'pageSize': page_size,
             'sortBy': 'relevancy',
         }
 
+    @classmethod
+    def stream_top_headlines(cls, category=None, source=None, page_size=100):
+        """Yields processed headlines one by one straight from NewsAPI, bypassing the response cache"""
+        params = cls._normalize_params(cls._headlines_params(category, source, 1, page_size))
+        return pipeline.process(cls._request_raw('top-headlines', params) or [])
+
+    @classmethod
+    def cache_stats(cls):
+        """Returns hit, miss and stale counters of the response cache"""
+        keys = {f'{cls.CACHE_PREFIX}:stats:{name}': name for name in ('hit', 'miss', 'stale')}
+        values = cache.get_many(keys)
+        return {name: values.get(key, 0) for key, name in keys.items()}
+
+    @classmethod
+    def _get_articles(cls, endpoint, params):
+        """Returns processed articles from cache, fetching them from NewsAPI on a miss.
+
+        Entries older than the endpoint TTL are served as is while a single
+        background refresh replaces them.
+        """
+        params = cls._normalize_params(params)
+        key = cls._cache_key(endpoint, params)
+
+        entry = cache.get(key)
+        if entry is not None:
+            if time.time() - entry['fetched_at'] < cls._cache_ttl(endpoint):
+                cls._count('hit')
+            else:
+                cls._count('stale')
+                cls._refresh_in_background(endpoint, params, key)
+            return entry['articles']
+
+        cls._count('miss')
+        articles = cls.coalescer.do(
+            key,
+            lambda: cls._fetch(endpoint, params, key),
+            peek=lambda: cls._peek(key)
+        )
+        return articles if articles is not None else []
+
+    @classmethod
+    async def _aget_articles(cls, endpoint, params):
+        """Async version of _get_articles. Stale entries are still refreshed in a thread"""
+        params = cls._normalize_params(params)
+        key = cls._cache_key(endpoint, params)
+
+        entry = await cache.aget(key)
+        if entry is not None:
+            if time.time() - entry['fetched_at'] < cls._cache_ttl(endpoint):
+                await cls._acount('hit')
+            else:
+                await cls._acount('stale')
+                await sync_to_async(cls._refresh_in_background)(endpoint, params, key)
+            return entry['articles']
+
+        await cls._acount('miss')
+        articles = await cls.coalescer.ado(
+            key,
+            lambda: cls._afetch(endpoint, params, key),
+            peek=lambda: cls._apeek(key)
+        )
+        return articles if articles is not None else []
+
+    @classmethod
+    def _fetch(cls, endpoint, params, key):
+        """Requests NewsAPI and caches successful result"""
+        articles = cls._request(endpoint, params)
+        if articles is not None:
+            cls._store(endpoint, key, articles)
+        return articles
+
+    @classmethod
+    async def _afetch(cls, endpoint, params, key):
+        articles = await cls._arequest(endpoint, params)
+        if articles is not None:
+            await cache.aset(key, cls._entry(articles), timeout=cls._entry_timeout(endpoint))
+        return articles
+
+    @classmethod
+    def _peek(cls, key):
+        entry = cache.get(key)
+        return entry['articles'] if entry else None
+
+    @classmethod
+    async def _apeek(cls, key):
+        entry = await cache.aget(key)
+        return entry['articles'] if entry else None
+
+    @classmethod
+    def _request(cls, endpoint, params):
+        """Performs NewsAPI request. Returns None if the request failed"""
+        articles = cls._request_raw(endpoint, params)
+        if articles is None:
+            return None
+        return cls._process_articles(articles)
+
+    @classmethod
+    def _request_raw(cls, endpoint, params):
+        """Returns raw articles of NewsAPI response or None if the request failed"""
         try:
-            response = requests.get(url, params=params, timeout=10)
+            response = HTTPClient.get(
+                f'{cls.BASE_URL}/{endpoint}',
+                params={'apiKey': settings.NEWS_API_KEY, **params},
+                timeout=10
+            )
+            if response.status_code == 200:
+                return response.json().get('articles', [])
+            return None
+        except Exception as e:
+            print(f'Error fetching news from {endpoint}: {e}')
+            return None
+
+    @classmethod
+    async def _arequest(cls, endpoint, params):
+        """Async version of _request"""
+        try:
+            response = await AsyncHTTPClient.get(
+                f'{cls.BASE_URL}/{endpoint}',
+                params={'apiKey': settings.NEWS_API_KEY, **params},
+                timeout=10
+            )
             if response.status_code == 200:
                 data = response.json()
                 return cls._process_articles(data.get('articles', []))
-            return []
+            return None
         except Exception as e:
-            print(f'Error searching news: {e}')
-            return []
+            print(f'Error fetching news from {endpoint}: {e}')
+            return None
 
     @classmethod
-    def _clean_content(cls, content):
-        """Method designed for cleaning news content by removing invalid characters"""
-        if not content:
-            return ''
+    def _refresh_in_background(cls, endpoint, params, key):
+        """Starts refresh of a stale entry unless another one is already running"""
+        lock_key = f'{key}:refresh'
+        if not cache.add(lock_key, True, timeout=cls.REFRESH_LOCK_TIMEOUT):
+            return
 
-        if '[+' in content and 'chars]' in content:
-            content = content.split('[+')[0].strip()
+        def refresh():
+            try:
+                cls.coalescer.do(key, lambda: cls._fetch(endpoint, params, key))
+            finally:
+                cache.delete(lock_key)
 
-        if 'PROMOTED' in content:
+        threading.Thread(target=refresh, daemon=True).start()
 
-            before_promoted = content.split('PROMOTED')[0].strip()
+    @classmethod
+    def _store(cls, endpoint, key, articles):
+        cache.set(key, cls._entry(articles), timeout=cls._entry_timeout(endpoint))
 
-            if len(before_promoted) > 50:
-                content = before_promoted
-            else:
-                return ''
+    @classmethod
+    def _entry(cls, articles):
+        return {'fetched_at': time.time(), 'articles': articles}
 
-        copyright_markers = [
-            'E-mail :',
-            '[email protected]',
-            '+380 95 641 22 07',
-            'R40-02280',
-            'R40-02162',
-            '01032,',
-            '© 2014-2025',
-        ]
+    @classmethod
+    def _entry_timeout(cls, endpoint):
+        return cls._cache_ttl(endpoint) + cls._stale_ttl()
 
-        for marker in copyright_markers:
-            if marker in content:
-                before_marker = content.split(marker)[0].strip()
-                if len(before_marker) > 50:
-                    content = before_marker
-                else:
-                    return ''
+    @classmethod
+    def _normalize_params(cls, params):
+        """Brings query params to a canonical form, e.g. page '2' and 2 are the same"""
+        normalized = {}
+        for name, value in params.items():
+            if value in (None, ''):
+                continue
+            if name in ('page', 'pageSize'):
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    value = 1
+            normalized[name] = str(value).strip() if isinstance(value, str) else value
+        return dict(sorted(normalized.items()))
 
-        content = re.sub(r'^[\(\)\s\-\r\n]+', '', content)
+    @classmethod
+    def _cache_key(cls, endpoint, params):
+        digest = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return f'{cls.CACHE_PREFIX}:{endpoint}:{digest}'
 
-        if len(content) < 100:
-            return ''
+    @classmethod
+    def _cache_ttl(cls, endpoint):
+        ttls = getattr(settings, 'NEWS_API_CACHE_TTL', {})
+        return ttls.get(endpoint, cls.DEFAULT_CACHE_TTL)
 
-        words = [w for w in content.split() if len(w) > 0]
-        if not words:
-            return ''
+    @classmethod
+    def _stale_ttl(cls):
+        return getattr(settings, 'NEWS_API_CACHE_STALE_TTL', cls.DEFAULT_STALE_TTL)
 
-        short_words = [w for w in words if len(w) <= 2]
-        if len(short_words) > len(words) * 0.6:
-            return ''
+    @classmethod
+    def _count(cls, name):
+        key = f'{cls.CACHE_PREFIX}:stats:{name}'
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+    @classmethod
+    async def _acount(cls, name):
+        key = f'{cls.CACHE_PREFIX}:stats:{name}'
+        await cache.aadd(key, 0, timeout=None)
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, timeout=None)
 
-        return content.strip()
+    @classmethod
+    def _clean_content(cls, content):
+        """Method designed for cleaning news content by removing invalid characters"""
+        return content_cleaner.clean(content)
 
     @classmethod
     def _process_articles(cls, articles):
         """Process articles"""
-        processed = []
-        for article in articles:
-            if not article.get('title') or article.get('title') == '[Removed]':
-                continue
-
-            content = cls._clean_content(article.get('content', ''))
-
-            description = article.get('description', '')
-            if not content and not description:
-                continue
-
-            processed_article = {
-                'title': article.get('title', ''),
-                'description': description,
-                'content': content,
-                'url': article.get('url', ''),
-                'image_url': article.get('urlToImage', ''),
-                'source': article.get('source', {}).get('name', ''),
-            }
-            processed.append(processed_article)
-
-        return processed
+        return list(pipeline.process(articles))
 
 
 CATEGORIES = [
@@ -0,0 +1,155 @@
+"""
+Session engine with write-behind database writes (SESSION_ENGINE = 'news.sessions').
+
+Sessions are read and written through the cache like cached_db. Updates of
+existing sessions reach the database in bulk, at most every
+SESSION_WRITE_BEHIND_INTERVAL seconds, instead of one UPDATE per request.
+A session is re-saved only when less than SESSION_REFRESH_REMAINING seconds
+of its age are left, so read-only requests do not write at all.
+
+New sessions, deletes and key changes (login, logout, password change) are
+written to the database at once. A pending row only updates a session row that
+still exists and has not been saved with a later expiry by another process, so
+a flush never brings back a deleted session or overwrites newer data. Rows
+still pending when a process stops are dropped, they only hold refreshed
+expiry and data that is not needed for authentication.
+
+Sessions use the SESSION_CACHE_ALIAS cache. A session missing from the cache
+is read from the pending writes of this process if its database row still
+exists and is not newer. With
+several processes the cache must be shared (e.g. Redis or Memcached),
+otherwise a process may read a session from the database before the owner of
+the pending write has flushed it.
+"""
+import threading
+import time
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.core.signals import request_finished
+from django.db.models import Case, DateTimeField, Q, TextField, Value, When
+
+REFRESHED_KEY = '_refreshed_at'
+FLUSH_BATCH_SIZE = 100
+
+
+class WriteBehindQueue:
+    """Latest pending database row per session key, written in bulk"""
+    _lock = threading.Lock()
+    _pending = {}
+    _flushed_at = time.monotonic()
+
+    @classmethod
+    def put(cls, row):
+        with cls._lock:
+            cls._pending[row.session_key] = row
+
+    @classmethod
+    def get(cls, session_key):
+        with cls._lock:
+            return cls._pending.get(session_key)
+
+    @classmethod
+    def discard(cls, session_key):
+        with cls._lock:
+            cls._pending.pop(session_key, None)
+
+    @classmethod
+    def flush(cls, force=False):
+        """Writes pending rows if the interval passed or the queue is full. Returns number of rows"""
+        with cls._lock:
+            due = (
+                force
+                or len(cls._pending) >= settings.SESSION_WRITE_BEHIND_MAX_PENDING
+                or time.monotonic() - cls._flushed_at >= settings.SESSION_WRITE_BEHIND_INTERVAL
+            )
+            if not cls._pending or not due:
+                return 0
+            pending, cls._pending = cls._pending, {}
+            cls._flushed_at = time.monotonic()
+
+        rows = list(pending.values())
+        try:
+            written = sum(
+                cls._update(rows[i:i + FLUSH_BATCH_SIZE])
+                for i in range(0, len(rows), FLUSH_BATCH_SIZE)
+            )
+        except Exception as e:
+            print(f'Error writing sessions: {e}')
+            with cls._lock:
+                for key, row in pending.items():
+                    cls._pending.setdefault(key, row)
+            return 0
+        return written
+
+    @staticmethod
+    def _update(rows):
+        """Updates rows still in the database and not saved later elsewhere, in one query"""
+        def by_key(field, output_field):
+            return Case(
+                *[When(session_key=row.session_key, then=Value(getattr(row, field))) for row in rows],
+                output_field=output_field,
+            )
+
+        current = reduce(or_, (
+            Q(session_key=row.session_key, expire_date__lte=row.expire_date) for row in rows
+        ))
+        return rows[0].__class__.objects.filter(current).update(
+            session_data=by_key('session_data', TextField()),
+            expire_date=by_key('expire_date', DateTimeField()),
+        )
+
+
+class SessionStore(cached_db.SessionStore):
+
+    def load(self):
+        data = super().load()
+        if data:
+            refreshed_at = data.get(REFRESHED_KEY)
+            # _session_expiry is passed explicitly, self._session is not loaded yet
+            expiry_age = self.get_expiry_age(expiry=data.get('_session_expiry'))
+            if refreshed_at is None or refreshed_at + expiry_age - time.time() < settings.SESSION_REFRESH_REMAINING:
+                self.modified = True
+        return data
+
+    def _get_session_from_db(self):
+        stored = super()._get_session_from_db()
+        # A session evicted from the cache may have a newer row waiting to be written,
+        # unless another process deleted or re-saved it meanwhile
+        row = WriteBehindQueue.get(self.session_key)
+        if row is None:
+            return stored
+        if stored is None or stored.expire_date > row.expire_date:
+            WriteBehindQueue.discard(self.session_key)
+            return stored
+        return row
+
+    def cycle_key(self):
+        # Login and password change: the new key must carry the auth data at once
+        self._write_through = True
+        super().cycle_key()
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        data[REFRESHED_KEY] = int(time.time())
+
+        # New keys must be inserted right away to detect collisions
+        if self.session_key is None or must_create or getattr(self, '_write_through', False):
+            WriteBehindQueue.discard(self.session_key)
+            return super().save(must_create=must_create)
+
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        WriteBehindQueue.put(self.create_model_instance(data))
+
+    def delete(self, session_key=None):
+        WriteBehindQueue.discard(session_key or self.session_key)
+        super().delete(session_key)
+
+
+def flush_sessions(**kwargs):
+    WriteBehindQueue.flush()
+
+
+request_finished.connect(flush_sessions, dispatch_uid='news.sessions.flush')
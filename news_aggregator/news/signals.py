@@ -1,12 +1,25 @@
+from django.core.signals import request_started
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
+from .dedup import stories
+from .ingestion import IngestionService
 from .models import SavedArticle
+from .orphans import OrphanCollector
 
 
 @receiver(post_delete, sender=SavedArticle)
-def delete_orphaned_article(sender, instance, **kwargs):
-    """Deletes news article that are not saved by any user"""
-    article = instance.article
+def mark_orphan_candidate(sender, instance, **kwargs):
+    """Marks article whose save was removed. It is deleted by manage.py collect_orphans
+    if nobody else has saved it"""
+    OrphanCollector.mark(instance.article_id)
 
-    if not SavedArticle.objects.filter(article=article).exists():
-        article.delete()
+
+@receiver(request_started, dispatch_uid='news.signals.warm_stories')
+def warm_stories(sender, **kwargs):
+    """Loads stored stories into the near-duplicate index on the first request of a process,
+    so NewsAPI fallbacks get the same story ids as the ingested feed"""
+    if not stories.warmed:
+        try:
+            IngestionService.warm_stories()
+        except Exception as e:
+            print(f'Error loading stories: {e}')
@@ -0,0 +1,14 @@
+from django import template
+from django.urls import reverse
+
+from news.images import ImageProxy
+
+register = template.Library()
+
+
+@register.filter
+def proxied(url, size):
+    """Image proxy URL of an external image, resized to one of NEWS_IMAGE_SIZES"""
+    if not url:
+        return ''
+    return reverse('news:image_proxy', args=[size, ImageProxy.sign(url)])
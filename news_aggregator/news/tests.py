@@ -1,7 +1,44 @@
-from django.test import TestCase, Client
+import asyncio
+import io
+import ipaddress
+import os
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, transaction
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from .models import NewsArticle, SavedArticle
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from PIL import Image
+from .models import NewsArticle, SavedArticle, Translation, APIHealthCheck, url_digest
+from .services import NewsAPIService, CATEGORIES, SOURCES
+from .ingestion import IngestionService
+from .search import LocalSearchService
+from .health import HealthMonitor
+from .orphans import OrphanCollector
+from .saved import SavedURLSet, saved_facets
+from .pagination import KeysetPaginator
+from .page_cache import CSRF_PLACEHOLDER
+from .images import ImageProxy, PublicAddressAdapter
+from .dedup import NearDuplicateIndex, minhash, stories, story_text
+from .sessions import SessionStore, WriteBehindQueue, REFRESHED_KEY
+from .http_client import AsyncHTTPClient, HTTPClient
+from .coalescing import SingleFlight
+from .translations import TranslationService
+from .cleaning import content_cleaner
+from . import pipeline
 
 User = get_user_model()
 
@@ -10,6 +47,7 @@ class NewsViewsTestCase(TestCase):
 
     def setUp(self):
         """Set up test data"""
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             username='testuser',
@@ -40,22 +78,50 @@ class NewsViewsTestCase(TestCase):
 
     def test_article_detail_view(self):
         """News article detail test"""
-        session = self.client.session
-        session['current_article'] = {
-            'title': self.article.title,
-            'description': self.article.description,
-            'content': self.article.content,
-            'url': self.article.url,
-            'source': self.article.source,
-        }
-        session.save()
-
         response = self.client.get(
-            reverse('news:article_detail', kwargs={'article_url': self.article.url})
+            reverse('news:article_detail', kwargs={'article_id': self.article.short_id})
         )
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'news/detail.html')
 
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_feed_article_opens_by_id(self, get):
+        """Articles rendered on the main page open without being posted back"""
+        cache.clear()
+        get.return_value = make_api_response([API_ARTICLE])
+
+        response = self.client.get(reverse('news:index'))
+        article = response.context['articles'][0]
+        detail_url = reverse('news:article_detail', kwargs={'article_id': article['id']})
+        self.assertContains(response, detail_url)
+
+        response = self.client.get(detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['article']['url'], API_ARTICLE['url'])
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_feed_article_outlives_default_cache(self, get):
+        """Feed articles are kept in their own cache, evicting pages and fragments does not lose them"""
+        get.return_value = make_api_response([API_ARTICLE])
+        article = self.client.get(reverse('news:index')).context['articles'][0]
+
+        cache.clear()
+        response = self.client.get(reverse('news:article_detail', kwargs={'article_id': article['id']}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['article']['url'], API_ARTICLE['url'])
+
+    def test_unknown_article_id_redirects(self):
+        """Expired or unknown ids go back to the main page"""
+        response = self.client.get(reverse('news:article_detail', kwargs={'article_id': '0' * 16}))
+        self.assertEqual(response.status_code, 302)
+
+    def test_partial_article_id_is_not_found(self):
+        """Only full article ids are looked up, a prefix does not open some article"""
+        for article_id in ('a', '0', self.article.short_id[:8], self.article.short_id.upper()):
+            response = self.client.get(f'/article/{article_id}/')
+            self.assertEqual(response.status_code, 404)
+
     def test_save_article_requires_login(self):
         """Saving article by unauthenticated user test"""
         response = self.client.post(reverse('news:save_article'), {
@@ -82,6 +148,21 @@ class NewsViewsTestCase(TestCase):
             NewsArticle.objects.filter(url='https://example.com/new').exists()
         )
 
+    def test_save_article_without_url_is_rejected(self):
+        """Articles without a link are not saved under a shared empty URL"""
+        self.client.login(username='testuser', password='testpass123')
+        articles = NewsArticle.objects.count()
+
+        for url in (None, '', '   '):
+            data = {'title': 'No link', 'source': 'Source'}
+            if url is not None:
+                data['url'] = url
+            response = self.client.post(reverse('news:save_article'), data)
+            self.assertEqual(response.status_code, 302)
+
+        self.assertEqual(NewsArticle.objects.count(), articles)
+        self.assertFalse(SavedArticle.objects.filter(user=self.user).exists())
+
     def test_read_later_requires_login(self):
         """Access read later list by unauthenticated user test"""
         response = self.client.get(reverse('news:read_later'))
@@ -185,6 +266,16 @@ class NewsModelsTestCase(TestCase):
                 source='Another Source'
             )
 
+    def test_url_hash_filled_on_save_and_bulk_create(self):
+        """URL digest is computed for every way of inserting articles"""
+        NewsArticle.objects.bulk_create([
+            NewsArticle(title='Bulk Article', url='https://example.com/bulk'),
+        ])
+
+        self.assertEqual(self.article.url_hash, url_digest('https://example.com/test'))
+        self.assertEqual(len(self.article.url_hash), 64)
+        self.assertTrue(NewsArticle.objects.filter(url_hash=url_digest('https://example.com/bulk')).exists())
+
     def test_many_to_many_relationship(self):
         """Many-to-many relationship test"""
         SavedArticle.objects.create(user=self.user, article=self.article)
@@ -192,3 +283,1453 @@ class NewsModelsTestCase(TestCase):
         self.assertEqual(self.article.saved_by.count(), 1)
         self.assertEqual(self.user.saved_articles.count(), 1)
         self.assertIn(self.article, self.user.saved_articles.all())
+
+
+def make_api_response(articles, status_code=200):
+    """Builds fake NewsAPI response"""
+    response = mock.Mock(status_code=status_code)
+    response.json.return_value = {'status': 'ok', 'articles': articles}
+    return response
+
+
+API_ARTICLE = {
+    'title': 'Cached Article',
+    'description': 'Cached description',
+    'content': '',
+    'url': 'https://example.com/cached',
+    'urlToImage': '',
+    'source': {'id': None, 'name': 'Example'},
+}
+
+
+class NewsAPIServiceCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('news.services.HTTPClient.get')
+    def test_identical_params_are_served_from_cache(self, get):
+        """Same params with different representation hit cache"""
+        get.return_value = make_api_response([API_ARTICLE])
+
+        first = NewsAPIService.fetch_top_headlines(category='business', page='1')
+        second = NewsAPIService.fetch_top_headlines(category='business', page=1)
+
+        self.assertEqual(first, second)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(NewsAPIService.cache_stats(), {'hit': 1, 'miss': 1, 'stale': 0})
+
+    @mock.patch('news.services.HTTPClient.get')
+    def test_failed_response_is_not_cached(self, get):
+        """Upstream errors are not cached"""
+        get.return_value = make_api_response([], status_code=500)
+
+        self.assertEqual(NewsAPIService.search_news('test'), [])
+        self.assertEqual(NewsAPIService.search_news('test'), [])
+        self.assertEqual(get.call_count, 2)
+
+    @mock.patch('news.services.threading.Thread')
+    @mock.patch('news.services.HTTPClient.get')
+    def test_stale_entry_is_served_while_refreshing(self, get, thread):
+        """Expired entry is returned at once and refreshed in background"""
+        get.return_value = make_api_response([API_ARTICLE])
+        NewsAPIService.fetch_top_headlines()
+
+        with mock.patch('news.services.time.time', return_value=time.time() + 3000):
+            stale = NewsAPIService.fetch_top_headlines()
+            NewsAPIService.fetch_top_headlines()
+
+        self.assertEqual(stale[0]['title'], 'Cached Article')
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(thread.call_count, 1)
+        self.assertEqual(NewsAPIService.cache_stats()['stale'], 2)
+
+        thread.call_args.kwargs['target']()
+        self.assertEqual(get.call_count, 2)
+
+    async def test_async_search_shares_cache_with_sync_search(self):
+        """Async fetch stores entry that sync callers reuse"""
+        with mock.patch('news.services.AsyncHTTPClient.get', new_callable=mock.AsyncMock) as aget:
+            aget.return_value = make_api_response([API_ARTICLE])
+            articles = await NewsAPIService.asearch_news('cached')
+
+        with mock.patch('news.services.HTTPClient.get') as get:
+            self.assertEqual(NewsAPIService.search_news('cached'), articles)
+            get.assert_not_called()
+
+
+class IngestionServiceTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    @mock.patch('news.services.HTTPClient.get')
+    def test_ingest_all_upserts_every_feed(self, get):
+        """Each category and source feed is stored once per URL"""
+        get.return_value = make_api_response([
+            dict(API_ARTICLE, publishedAt='2025-11-10T10:00:00Z'),
+        ])
+
+        IngestionService.ingest_all()
+
+        self.assertEqual(get.call_count, len(CATEGORIES) + len(SOURCES))
+        article = NewsArticle.objects.get(url=API_ARTICLE['url'])
+        self.assertIsNotNone(article.fetched_at)
+        self.assertIsNotNone(article.published_at)
+        self.assertNotEqual(article.category, '')
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_index_serves_stored_feed(self, get):
+        """Main page does not call NewsAPI when feed is stored"""
+        processed = NewsAPIService._process_articles([API_ARTICLE])
+        IngestionService.store(processed, category='business')
+
+        response = self.client.get(reverse('news:index'), {'category': 'business'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['articles'][0]['url'], API_ARTICLE['url'])
+        get.assert_not_called()
+
+    def test_removing_save_keeps_ingested_article(self):
+        """Stored headline survives when the last user removes it"""
+        processed = NewsAPIService._process_articles([API_ARTICLE])
+        IngestionService.store(processed, category='business')
+        article = NewsArticle.objects.get(url=API_ARTICLE['url'])
+
+        SavedArticle.objects.create(user=self.user, article=article).delete()
+
+        self.assertTrue(NewsArticle.objects.filter(pk=article.pk).exists())
+
+
+class HTTPClientTestCase(TestCase):
+
+    def setUp(self):
+        HTTPClient.reset()
+
+    def tearDown(self):
+        HTTPClient.reset()
+
+    def test_session_is_shared_and_retries_upstream_errors(self):
+        """One pooled session is used with retries on 429 and 5xx"""
+        session = HTTPClient.session()
+        self.assertIs(session, HTTPClient.session())
+
+        retry = session.get_adapter('https://newsapi.org/v2').max_retries
+        self.assertIn(429, retry.status_forcelist)
+        self.assertIn(503, retry.status_forcelist)
+
+    def test_retry_after_does_not_block_the_thread(self):
+        """A long Retry-After is not honoured, retries wait for the capped backoff"""
+        retry = HTTPClient.session().get_adapter('https://newsapi.org/v2').max_retries
+        response = mock.Mock(headers={'Retry-After': '3600'}, status=429)
+
+        self.assertFalse(retry.respect_retry_after_header)
+        self.assertEqual(retry.backoff_max, HTTPClient.MAX_RETRY_DELAY)
+        self.assertLessEqual(retry.new(total=0).get_backoff_time(), HTTPClient.MAX_RETRY_DELAY)
+        with mock.patch('urllib3.util.retry.time.sleep') as sleep:
+            retry.sleep(response)
+        sleep.assert_not_called()
+
+    def test_async_requests_outside_asgi_use_shared_pool(self):
+        """Loops of async_to_sync do not get httpx clients of their own"""
+        with mock.patch.object(HTTPClient, 'get', return_value='response') as get:
+            first = async_to_sync(AsyncHTTPClient.get)('https://newsapi.org/v2/top-headlines')
+            second = async_to_sync(AsyncHTTPClient.get)('https://newsapi.org/v2/top-headlines')
+
+        self.assertEqual((first, second), ('response', 'response'))
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(len(AsyncHTTPClient._clients), 0)
+
+    @mock.patch.object(AsyncHTTPClient, 'event_loop_pool', True)
+    def test_asgi_loop_reuses_its_client(self):
+        """Under ASGI one httpx client serves the whole event loop"""
+        async def clients():
+            return AsyncHTTPClient.client(), AsyncHTTPClient.client()
+
+        first, second = async_to_sync(clients)()
+        self.assertIs(first, second)
+
+    @mock.patch('news.http_client.time.sleep')
+    def test_call_with_retries_records_host_metrics(self, sleep):
+        """Failed calls are retried with backoff and counted per host"""
+        func = mock.Mock(side_effect=[ConnectionError('reset'), 'ok'])
+
+        result = HTTPClient.call_with_retries('https://translate.google.com', func, 'text')
+
+        self.assertEqual(result, 'ok')
+        self.assertEqual(sleep.call_count, 1)
+        stats = HTTPClient.stats()['translate.google.com']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['retries'], 1)
+
+    @mock.patch('news.http_client.time.sleep')
+    def test_call_with_retries_does_not_retry_other_errors(self, sleep):
+        """Errors that are not network failures or timeouts are raised at once"""
+        func = mock.Mock(side_effect=ValueError('invalid destination language'))
+
+        with self.assertRaises(ValueError):
+            HTTPClient.call_with_retries('https://translate.google.com', func, 'text')
+
+        self.assertEqual(func.call_count, 1)
+        sleep.assert_not_called()
+
+
+class SingleFlightTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        NewsAPIService.coalescer.reset()
+
+    def test_concurrent_misses_share_one_request(self):
+        """Only one upstream request is made for identical concurrent queries"""
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return make_api_response([API_ARTICLE])
+
+        with mock.patch('news.services.HTTPClient.get', side_effect=slow_get) as get:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(NewsAPIService.search_news('breaking')))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            while NewsAPIService.coalescer.stats()['calls'] < 5:
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(NewsAPIService.coalescer.stats()['collapsed'], 4)
+
+    async def test_concurrent_async_misses_share_one_request(self):
+        """Async callers on one loop await the same upstream request"""
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return make_api_response([API_ARTICLE])
+
+        with mock.patch('news.services.AsyncHTTPClient.get', side_effect=slow_get) as get:
+            results = await asyncio.gather(*(NewsAPIService.asearch_news('breaking') for _ in range(5)))
+
+        self.assertEqual(get.call_count, 1)
+        self.assertTrue(all(result == results[0] for result in results))
+
+    async def test_cancelled_async_leader_does_not_block_followers(self):
+        """A follower of a cancelled leader runs the call itself instead of waiting forever"""
+        flight = SingleFlight('test')
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(0.05)
+            return 'result'
+
+        leader = asyncio.create_task(flight.ado('key', slow))
+        await started.wait()
+        follower = asyncio.create_task(flight.ado('key', slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await asyncio.wait_for(follower, 1), 'result')
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+    def test_cluster_waiter_uses_result_of_lock_holder(self):
+        """Process that lost cluster lock reads result instead of calling upstream"""
+        flight = SingleFlight('test', cluster=True, poll_interval=0.01)
+        cache.set('singleflight:test:key', True)
+        func = mock.Mock()
+
+        result = flight.do('key', func, peek=lambda: 'from-other-process')
+
+        self.assertEqual(result, 'from-other-process')
+        func.assert_not_called()
+        self.assertEqual(flight.stats()['cluster_collapsed'], 1)
+
+
+class TranslationStoreTestCase(TestCase):
+
+    ARTICLE = {
+        'title': 'Hello',
+        'description': 'World',
+        'content': '',
+        'url': 'https://example.com/hello',
+    }
+
+    def setUp(self):
+        TranslationService.memory.clear()
+        self.translator = mock.Mock()
+        self.translator.translate.side_effect = lambda text, dest, src: mock.Mock(text=f'{dest}:{text}')
+        patcher = mock.patch.object(TranslationService, 'translator', return_value=self.translator)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_translation_is_served_from_memory(self):
+        """Second translation of the same article does not call translator"""
+        first = TranslationService.translate_article(self.ARTICLE, 'uk')
+        second = TranslationService.translate_article(self.ARTICLE, 'uk')
+
+        self.assertEqual(first['title'], 'uk:Hello')
+        self.assertEqual(first, second)
+        self.assertEqual(self.translator.translate.call_count, 2)
+
+    def test_translation_survives_restart(self):
+        """Stored translations are used after memory cache is lost"""
+        TranslationService.translate_article(self.ARTICLE, 'de')
+        TranslationService.memory.clear()
+
+        translated = TranslationService.translate_article(self.ARTICLE, 'de')
+
+        self.assertEqual(translated['description'], 'de:World')
+        self.assertEqual(self.translator.translate.call_count, 2)
+        self.assertEqual(Translation.objects.filter(target_lang='de').count(), 2)
+
+    async def test_async_translation_uses_store(self):
+        """Async translation reads translations saved by sync path"""
+        await sync_to_async(TranslationService.translate_article)(self.ARTICLE, 'fr')
+        TranslationService.memory.clear()
+
+        translated = await TranslationService.atranslate_article(self.ARTICLE, 'fr')
+
+        self.assertEqual(translated['title'], 'fr:Hello')
+        self.assertEqual(self.translator.translate.call_count, 2)
+
+    @override_settings(TRANSLATION_FIELD_TIMEOUT=0.2)
+    def test_slow_field_does_not_stall_article(self):
+        """Fields are translated concurrently and a slow one keeps its original text"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def translate(text, dest, src):
+            if text == 'World':
+                release.wait(5)
+            return mock.Mock(text=f'{dest}:{text}')
+
+        self.translator.translate.side_effect = translate
+        saved = threading.Event()
+
+        with mock.patch.object(TranslationService, '_save_late', side_effect=lambda *args: saved.set()):
+            started = time.monotonic()
+            translated = TranslationService.translate_article(self.ARTICLE, 'pl')
+            elapsed = time.monotonic() - started
+            release.set()
+            saved.wait(5)
+
+        self.assertLess(elapsed, 2)
+        self.assertEqual(translated['title'], 'pl:Hello')
+        self.assertEqual(translated['description'], 'World')
+        self.assertFalse(Translation.objects.filter(translated_text='pl:World').exists())
+
+    @override_settings(TRANSLATION_FIELD_TIMEOUT=0.2)
+    def test_late_translation_is_stored_by_worker(self):
+        """A translation that arrives after the timeout is stored for the next request"""
+        release = threading.Event()
+        saved = threading.Event()
+        self.addCleanup(release.set)
+        self.translator.translate.side_effect = lambda text, dest, src: (
+            release.wait(5), mock.Mock(text=f'{dest}:{text}'))[1]
+
+        with mock.patch.object(TranslationService, '_save_late', side_effect=lambda *args: saved.set()) as save:
+            self.assertEqual(TranslationService.translate_text('World', 'pl'), 'World')
+            release.set()
+            self.assertTrue(saved.wait(5))
+
+        save.assert_called_once_with('World', 'pl:World', 'auto', 'pl')
+
+    @override_settings(TRANSLATION_FIELD_TIMEOUT=0.2)
+    def test_queued_translations_are_cancelled_after_timeout(self):
+        """Texts still waiting for a worker are not translated once the request gave up"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.translator.translate.side_effect = lambda text, dest, src: (
+            release.wait(5), mock.Mock(text=f'{dest}:{text}'))[1]
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+
+        with mock.patch.object(TranslationService, 'executor', executor), \
+                mock.patch.object(TranslationService, '_save_late'):
+            translations = TranslationService.translate_texts(['one', 'two', 'three'], 'it')
+            release.set()
+            executor.shutdown(wait=True)
+
+        self.assertEqual(translations, {'one': 'one', 'two': 'two', 'three': 'three'})
+        self.assertEqual(self.translator.translate.call_count, 1)
+        self.assertEqual(TranslationService._pending, 0)
+
+    @override_settings(TRANSLATION_QUEUE_SIZE=0)
+    def test_full_queue_keeps_original_text(self):
+        """Nothing is queued over TRANSLATION_QUEUE_SIZE, texts fall back to the original"""
+        translated = TranslationService.translate_article(self.ARTICLE, 'es')
+
+        self.assertEqual(translated['title'], 'Hello')
+        self.translator.translate.assert_not_called()
+
+
+class ContentCleanerTestCase(TestCase):
+
+    BODY = ('Officials said the new energy policy will change how the city buys power '
+            'and heats public buildings over the next decade.')
+
+    def test_truncates_newsapi_chars_suffix(self):
+        """Content is cut at the [+N chars] suffix"""
+        self.assertEqual(content_cleaner.clean(f'  {self.BODY} More text here [+2841 chars]'),
+                         f'{self.BODY} More text here')
+
+    def test_keeps_bracket_plus_without_chars_suffix(self):
+        """[+ alone does not truncate content"""
+        content = f'{self.BODY} Call [+380 44] for details and more information.'
+        self.assertEqual(content_cleaner.clean(content), content)
+
+    def test_cuts_at_earliest_marker(self):
+        """Content is cut before the first copyright marker"""
+        content = f'{self.BODY} © 2014-2025 Site. E-mail : [email protected]'
+        self.assertEqual(content_cleaner.clean(content), f'{self.BODY}')
+
+    def test_rejects_short_prefix_before_marker(self):
+        """Content with too little text before a marker is dropped"""
+        self.assertEqual(content_cleaner.clean(f'Short intro PROMOTED {self.BODY}'), '')
+
+    def test_strips_leading_junk_and_rejects_short_words(self):
+        """Leading brackets and dashes are removed, word salad is dropped"""
+        self.assertEqual(content_cleaner.clean(f'(\r\n- {self.BODY}'), self.BODY)
+        self.assertEqual(content_cleaner.clean('a b c d e f g h ' * 20), '')
+
+
+class ArticlePipelineTestCase(TestCase):
+
+    def test_articles_are_processed_lazily(self):
+        """Stages pull articles one at a time"""
+        pulled = []
+
+        def source():
+            for index in range(3):
+                pulled.append(index)
+                yield dict(API_ARTICLE, url=f'https://example.com/{index}')
+
+        articles = pipeline.process(source())
+        self.assertEqual(pulled, [])
+
+        self.assertEqual(next(articles)['url'], 'https://example.com/0')
+        self.assertEqual(pulled, [0])
+
+    def test_removed_and_empty_articles_are_dropped(self):
+        """Removed articles and ones without text do not reach output"""
+        raw = [
+            dict(API_ARTICLE, title='[Removed]'),
+            dict(API_ARTICLE, description='', content=None),
+            dict(API_ARTICLE, source=None),
+        ]
+
+        processed = list(pipeline.process(raw))
+
+        self.assertEqual(len(processed), 1)
+        self.assertEqual(processed[0]['source'], '')
+
+    @override_settings(NEWS_INGEST_BATCH_SIZE=2)
+    def test_ingestion_stores_stream_in_batches(self):
+        """Stored feed is consumed in batches"""
+        titles = ['Markets rally', 'Storm hits coast', 'Election results', 'Vaccine approved', 'Team wins final']
+        articles = (
+            dict(API_ARTICLE, url=f'https://example.com/{index}', title=title, description=title)
+            for index, title in enumerate(titles)
+        )
+
+        with mock.patch.object(IngestionService, '_upsert', side_effect=lambda batch, *args: len(batch)) as upsert:
+            stored = IngestionService.store(pipeline.process(articles), category='science')
+
+        self.assertEqual(stored, 5)
+        self.assertEqual([len(call.args[0]) for call in upsert.call_args_list], [2, 2, 1])
+
+
+class LocalSearchTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for index in range(5):
+            NewsArticle.objects.create(
+                title=f'Climate summit day {index}',
+                description='Leaders meet',
+                url=f'https://example.com/climate-{index}',
+                source='Test Source',
+            )
+        NewsArticle.objects.create(
+            title='Football results',
+            description='Climate of the league',
+            url='https://example.com/football',
+            source='Test Source',
+        )
+
+    def test_search_matches_stored_articles(self):
+        """Title and description matches are returned"""
+        results = LocalSearchService.search('climate')
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[0]['image_url'], '')
+
+    @override_settings(NEWS_SEARCH_MIN_RESULTS=10)
+    def test_search_returns_none_below_minimum(self):
+        """Too few local matches are not served"""
+        self.assertIsNone(LocalSearchService.search('climate'))
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_index_search_served_locally(self, get):
+        """Search page does not call NewsAPI when enough articles are stored"""
+        response = self.client.get(reverse('news:index'), {'search': 'climate'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['articles']), 6)
+        get.assert_not_called()
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_index_search_falls_back_to_newsapi(self, get):
+        """Search goes upstream when local matches are too few"""
+        get.return_value = make_api_response([API_ARTICLE])
+
+        response = self.client.get(reverse('news:index'), {'search': 'football'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['articles'][0]['url'], API_ARTICLE['url'])
+        get.assert_called_once()
+
+
+class HealthMonitorTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123')
+
+    @mock.patch('news.health.HealthMonitor.session')
+    def test_run_stores_history_and_snapshot(self, session):
+        """Every probe is stored and summarized in cached snapshot"""
+        session.return_value.get.return_value = make_api_response([])
+
+        with mock.patch('news.health.cache.set', wraps=cache.set) as cache_set:
+            HealthMonitor.run()
+
+        self.assertEqual(APIHealthCheck.objects.count(), len(HealthMonitor.APIS))
+        snapshot = cache.get(HealthMonitor.SNAPSHOT_KEY)
+        self.assertTrue(snapshot['apis'][0]['status'].startswith('🟢'))
+        self.assertEqual(snapshot['apis'][0]['error_rate'], 0)
+        self.assertIsNotNone(cache_set.call_args.kwargs['timeout'])
+
+    def test_probes_bypass_shared_session(self):
+        """Probes are not retried and do not count in HTTPClient stats"""
+        HTTPClient.reset()
+        self.assertEqual(HealthMonitor.session().get_adapter('https://newsapi.org').max_retries.total, 0)
+
+        with mock.patch.object(HealthMonitor.session(), 'get', return_value=make_api_response([])), \
+                mock.patch('news.http_client.HTTPClient.session') as shared:
+            HealthMonitor.run()
+
+        shared.assert_not_called()
+        self.assertEqual(HTTPClient.stats(), {})
+
+    def test_snapshot_percentiles_and_error_rate(self):
+        """Latency percentiles and error rate are computed over the window"""
+        for latency in range(1, 21):
+            APIHealthCheck.objects.create(api='NewsAPI', ok=latency != 20, status_code=200, latency_ms=latency)
+
+        newsapi = HealthMonitor.build_snapshot()['apis'][0]
+
+        self.assertEqual(newsapi['p50_ms'], 10)
+        self.assertEqual(newsapi['p95_ms'], 19)
+        self.assertEqual(newsapi['error_rate'], 0.05)
+        self.assertEqual(newsapi['checks'], 20)
+
+    @mock.patch('news.health.HealthMonitor.session')
+    def test_admin_index_does_not_probe(self, session):
+        """Admin pages read snapshot instead of calling the APIs"""
+        self.client.login(username='admin', password='adminpass123')
+
+        response = self.client.get(reverse('custom_admin:index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['external_apis']), len(HealthMonitor.APIS))
+        session.assert_not_called()
+
+
+@override_settings(NEWS_ORPHAN_GRACE=0)
+class OrphanCollectorTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='other', password='testpass123')
+
+    def save_articles(self, user, count, prefix='a'):
+        articles = NewsArticle.objects.bulk_create([
+            NewsArticle(title=f'Article {index}', url=f'https://example.com/{prefix}{index}')
+            for index in range(count)
+        ])
+        SavedArticle.objects.bulk_create([SavedArticle(user=user, article=article) for article in articles])
+        return articles
+
+    def delete_saves(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                SavedArticle.objects.filter(user=user).delete()
+        return len(queries)
+
+    def test_bulk_delete_does_not_query_per_row(self):
+        """Removing many saves costs as many queries as removing a few"""
+        self.save_articles(self.user, 3, prefix='few')
+        self.save_articles(self.other, 30, prefix='many')
+
+        self.assertEqual(self.delete_saves(self.user), self.delete_saves(self.other))
+        self.assertEqual(NewsArticle.objects.filter(orphan_candidate=True).count(), 33)
+        self.assertEqual(NewsArticle.objects.count(), 33)
+
+    def test_collect_keeps_saved_and_fresh_articles(self):
+        """Only articles nobody saved and that are not fresh headlines are deleted"""
+        shared = self.save_articles(self.user, 1, prefix='shared')[0]
+        SavedArticle.objects.create(user=self.other, article=shared)
+        self.save_articles(self.user, 2, prefix='own')
+        processed = NewsAPIService._process_articles([API_ARTICLE])
+        IngestionService.store(processed, category='business')
+
+        self.delete_saves(self.user)
+        deleted = OrphanCollector.collect()
+
+        self.assertEqual(deleted, 2)
+        self.assertTrue(NewsArticle.objects.filter(pk=shared.pk).exists())
+        self.assertTrue(NewsArticle.objects.filter(url=API_ARTICLE['url']).exists())
+        self.assertFalse(NewsArticle.objects.filter(orphan_candidate=True).exists())
+
+    def test_candidates_are_seen_by_other_processes(self):
+        """Candidates live in the database, collect_candidates needs no state of the process that marked them"""
+        own = self.save_articles(self.user, 2, prefix='own')
+        SavedArticle.objects.create(user=self.other, article=own[0])
+        self.delete_saves(self.user)
+        cache.clear()
+
+        self.assertEqual(OrphanCollector.collect_candidates(), 1)
+        self.assertEqual(list(NewsArticle.objects.values_list('pk', 'orphan_candidate')), [(own[0].pk, False)])
+
+    def test_sweep_collects_in_batches(self):
+        """Orphans that were never marked are found by the sweep"""
+        NewsArticle.objects.bulk_create([
+            NewsArticle(title=f'Article {index}', url=f'https://example.com/{index}') for index in range(5)
+        ])
+
+        self.assertEqual(OrphanCollector.collect(batch_size=2), 5)
+        self.assertFalse(NewsArticle.objects.exists())
+
+
+class SavedURLSetTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = NewsArticle.objects.create(title='Saved', url='https://example.com/saved')
+        SavedArticle.objects.create(user=self.user, article=self.article)
+
+    def test_warm_set_does_not_query(self):
+        """Membership is answered from cache after the first load"""
+        SavedURLSet.for_user(self.user)
+
+        with self.assertNumQueries(0):
+            saved_urls = SavedURLSet.for_user(self.user)
+
+        self.assertIn('https://example.com/saved', saved_urls)
+        self.assertNotIn('https://example.com/other', saved_urls)
+
+    def test_save_and_remove_update_cached_set(self):
+        """Views keep the cached set in sync"""
+        self.client.login(username='testuser', password='testpass123')
+        SavedURLSet.for_user(self.user)
+
+        self.client.post(reverse('news:save_article'), {
+            'title': 'New',
+            'description': 'Description',
+            'content': 'Content',
+            'url': 'https://example.com/new',
+            'source': 'Source',
+        })
+        self.assertIn('https://example.com/new', SavedURLSet.for_user(self.user))
+
+        self.client.get(reverse('news:remove_article', kwargs={'article_id': self.article.id}))
+        self.assertNotIn('https://example.com/saved', SavedURLSet.for_user(self.user))
+
+    def test_set_rebuilt_before_commit_is_dropped(self):
+        """A set read by another request while a save commits is not kept"""
+        stale = SavedURLSet.for_user(self.user)
+        other = NewsArticle.objects.create(title='Other', url='https://example.com/other')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                SavedArticle.objects.create(user=self.user, article=other)
+                SavedURLSet.invalidate(self.user.pk)
+                cache.set(SavedURLSet._key(self.user.pk), set(stale.ids))
+
+        saved_urls = SavedURLSet.for_user(self.user)
+        self.assertIn('https://example.com/other', saved_urls)
+        self.assertEqual({len(short_id) for short_id in saved_urls.ids}, {16})
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_index_marks_saved_articles(self, get):
+        """Feed uses the set to mark saved articles"""
+        get.return_value = make_api_response([dict(API_ARTICLE, url='https://example.com/saved')])
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(reverse('news:index'))
+
+        self.assertIn('https://example.com/saved', response.context['saved_urls'])
+
+
+class KeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        articles = NewsArticle.objects.bulk_create([
+            NewsArticle(title=f'Article {index}', url=f'https://example.com/{index}') for index in range(45)
+        ])
+        SavedArticle.objects.bulk_create([SavedArticle(user=self.user, article=article) for article in articles])
+        # Equal timestamps make the id tie-breaker matter
+        self.saved = SavedArticle.objects.filter(user=self.user)
+        self.expected = list(self.saved.order_by('-saved_at', '-id'))
+
+    def paginator(self, **kwargs):
+        return KeysetPaginator(self.saved, 20, 'saved_at', **kwargs)
+
+    def test_pages_follow_cursors_both_ways(self):
+        """Next and previous cursors walk the list without gaps or repeats"""
+        first = self.paginator().get_page()
+        second = self.paginator().get_page(first.next_cursor)
+        third = self.paginator().get_page(second.next_cursor)
+
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(third.has_next())
+        self.assertEqual(third.number, 3)
+
+        back = self.paginator().get_page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(list(self.paginator().get_page(back.previous_cursor)), list(first))
+
+    def test_deep_page_costs_same_as_first(self):
+        """Any page is a single range query"""
+        first = self.paginator().get_page()
+        second = self.paginator().get_page(first.next_cursor)
+
+        with self.assertNumQueries(1):
+            self.paginator().get_page()
+        with self.assertNumQueries(1):
+            self.paginator().get_page(second.next_cursor)
+
+    def test_cursor_past_removed_rows_goes_back_to_first_page(self):
+        """A page emptied by removals redirects to the first page, keeping the filters"""
+        self.client.login(username='testuser', password='testpass123')
+        first = self.paginator().get_page()
+        second = self.paginator().get_page(first.next_cursor)
+        SavedArticle.objects.filter(pk__in=[saved.pk for saved in self.expected[20:]]).delete()
+
+        response = self.client.get(reverse('news:read_later'), {'cursor': second.next_cursor, 'category': ''})
+        self.assertRedirects(response, reverse('news:read_later') + '?category=')
+        response = self.client.get(reverse('news:read_later'), {'cursor': second.next_cursor})
+        self.assertRedirects(response, reverse('news:read_later'))
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Tampered cursors are ignored"""
+        page = self.paginator().get_page('not-a-cursor')
+
+        self.assertEqual(page.number, 1)
+        self.assertEqual(list(page), self.expected[:20])
+
+    def test_capped_total(self):
+        """Approximate total counts at most count_cap rows"""
+        page = self.paginator(count_cap=30).get_page()
+
+        self.assertEqual(page.count, 30)
+        self.assertTrue(page.count_capped)
+        self.assertEqual(page.num_pages, 2)
+
+    def test_read_later_renders_cursor_links(self):
+        """Read later page links to the next page by cursor"""
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(reverse('news:read_later'))
+        next_cursor = response.context['saved_articles'].next_cursor
+        self.assertContains(response, f'?cursor={next_cursor}')
+
+
+class SavedFacetsTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def save(self, url, **extra):
+        self.client.post(reverse('news:save_article'), dict({
+            'title': 'Title',
+            'description': 'Description',
+            'content': 'Content',
+            'url': url,
+            'source': 'BBC News',
+        }, **extra))
+
+    def test_save_captures_feed_context(self):
+        """Category and source of the feed are stored with the save"""
+        self.save('https://example.com/1', category='business', source_id='bbc-news')
+        self.save('https://example.com/2', category='not-a-category')
+
+        first = SavedArticle.objects.get(article__url='https://example.com/1')
+        self.assertEqual((first.category, first.source_id), ('business', 'bbc-news'))
+        self.assertEqual(SavedArticle.objects.get(article__url='https://example.com/2').category, '')
+
+    def test_read_later_filters_by_saved_category_and_source(self):
+        """Filters use the columns captured at save time"""
+        self.save('https://example.com/1', category='business', source_id='bbc-news')
+        self.save('https://example.com/2', category='sports', source_id='cnn')
+
+        response = self.client.get(reverse('news:read_later'), {'category': 'sports'})
+        self.assertEqual([saved.article.url for saved in response.context['saved_articles']], ['https://example.com/2'])
+
+        response = self.client.get(reverse('news:read_later'), {'source': 'bbc-news'})
+        self.assertEqual([saved.article.url for saved in response.context['saved_articles']], ['https://example.com/1'])
+
+    def test_facet_counts_in_one_query(self):
+        """Sidebar counts come from a single grouped query"""
+        self.save('https://example.com/1', category='business', source_id='bbc-news')
+        self.save('https://example.com/2', category='business', source_id='cnn')
+        self.save('https://example.com/3', category='sports', source_id='cnn')
+
+        with self.assertNumQueries(1):
+            categories, sources = saved_facets(self.user)
+
+        self.assertEqual(categories, {'business': 2, 'sports': 1})
+        self.assertEqual(sources, {'bbc-news': 1, 'cnn': 2})
+        response = self.client.get(reverse('news:read_later'))
+        self.assertIn(('business', 'Business', 2), response.context['categories'])
+
+
+class WriteBehindSessionTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches['sessions'].clear()
+        WriteBehindQueue.flush(force=True)
+
+    def stored_data(self, session):
+        return SessionStore().decode(Session.objects.get(session_key=session.session_key).session_data)
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_anonymous_request_does_not_create_session(self, get):
+        """Guests get their language from the cookie without a session"""
+        get.return_value = make_api_response([API_ARTICLE])
+        self.client.cookies['django_language'] = 'uk'
+        sessions = Session.objects.count()
+
+        response = self.client.get(reverse('news:index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertEqual(WriteBehindQueue.flush(force=True), 0)
+        self.assertEqual(Session.objects.count(), sessions)
+
+    def test_updates_are_written_behind(self):
+        """Changes are served from cache at once and reach the database on flush"""
+        session = SessionStore()
+        session['step'] = 1
+        session.create()
+
+        session['step'] = 2
+        session.save()
+
+        self.assertEqual(SessionStore(session.session_key)['step'], 2)
+        self.assertEqual(self.stored_data(session)['step'], 1)
+
+        self.assertEqual(WriteBehindQueue.flush(force=True), 1)
+        self.assertEqual(self.stored_data(session)['step'], 2)
+
+    def test_session_refreshed_only_near_expiry(self):
+        """Loading a recently saved session does not schedule a write"""
+        session = SessionStore()
+        session['step'] = 1
+        session.create()
+
+        fresh = SessionStore(session.session_key)
+        fresh.load()
+        self.assertFalse(fresh.modified)
+
+        session[REFRESHED_KEY] = int(time.time()) - settings.SESSION_COOKIE_AGE
+        caches['sessions'].set(session.cache_key, session._session)
+        stale = SessionStore(session.session_key)
+        stale.load()
+        self.assertTrue(stale.modified)
+
+    def test_evicted_session_is_read_from_pending_write(self):
+        """A session dropped from the cache before the flush does not fall back to the stale row"""
+        session = SessionStore()
+        session['step'] = 1
+        session.create()
+        session['step'] = 2
+        session.save()
+
+        caches['sessions'].delete(session.cache_key)
+
+        self.assertEqual(SessionStore(session.session_key)['step'], 2)
+        self.assertEqual(self.stored_data(session)['step'], 1)
+
+    def test_delete_drops_pending_write(self):
+        """Deleted sessions are not written back by a later flush"""
+        session = SessionStore()
+        session.create()
+        session['step'] = 2
+        session.save()
+
+        session.delete()
+
+        self.assertEqual(WriteBehindQueue.flush(force=True), 0)
+        self.assertFalse(Session.objects.filter(session_key=session.session_key).exists())
+
+    def test_flush_skips_sessions_deleted_elsewhere(self):
+        """A logout in another process is not undone by this process' pending write"""
+        session = SessionStore()
+        session.create()
+        session['step'] = 2
+        session.save()
+
+        Session.objects.filter(session_key=session.session_key).delete()
+        caches['sessions'].delete(session.cache_key)
+
+        self.assertEqual(SessionStore(session.session_key).load(), {})
+        session['step'] = 3
+        session.save()
+        self.assertEqual(WriteBehindQueue.flush(force=True), 0)
+        self.assertFalse(Session.objects.filter(session_key=session.session_key).exists())
+
+    def test_flush_does_not_overwrite_newer_rows(self):
+        """A pending row older than the stored one is skipped"""
+        session = SessionStore()
+        session['step'] = 1
+        session.create()
+        session['step'] = 2
+        session.save()
+
+        newer = SessionStore(session.session_key)
+        newer['step'] = 3
+        newer.set_expiry(settings.SESSION_COOKIE_AGE * 2)
+        Session.objects.filter(session_key=session.session_key).update(
+            session_data=newer.encode(newer._session),
+            expire_date=newer.get_expiry_date(),
+        )
+
+        self.assertEqual(WriteBehindQueue.flush(force=True), 0)
+        self.assertEqual(self.stored_data(session)['step'], 3)
+
+    def test_cycled_key_is_written_through(self):
+        """Login data reaches the database without waiting for a flush"""
+        session = SessionStore()
+        session['step'] = 1
+        session.create()
+        old_key = session.session_key
+
+        session.cycle_key()
+        session['_auth_user_id'] = '1'
+        session.save()
+
+        self.assertFalse(Session.objects.filter(session_key=old_key).exists())
+        self.assertEqual(self.stored_data(session)['_auth_user_id'], '1')
+        self.assertEqual(WriteBehindQueue.flush(force=True), 0)
+
+
+class FragmentCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        article = NewsArticle.objects.create(title='Saved', url=API_ARTICLE['url'])
+        SavedArticle.objects.create(user=self.user, article=article)
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_saved_state_is_applied_over_cached_card(self, get):
+        """Cached card markup is shared, the saved mark is per user"""
+        get.return_value = make_api_response([API_ARTICLE])
+
+        anonymous = self.client.get(reverse('news:index'))
+        self.client.login(username='testuser', password='testpass123')
+        logged_in = self.client.get(reverse('news:index'))
+
+        self.assertNotContains(anonymous, 'news-card is-saved')
+        self.assertContains(logged_in, 'news-card is-saved')
+        self.assertContains(logged_in, 'data-url="%s"' % API_ARTICLE['url'])
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_fragments_are_cached_per_language(self, get):
+        """Warm sidebar is not translated again and languages do not share it"""
+        get.return_value = make_api_response([API_ARTICLE])
+        # Guests get whole cached pages, fragments are what logged-in users reuse
+        self.client.login(username='testuser', password='testpass123')
+        self.client.cookies['django_language'] = 'uk'
+        self.client.get(reverse('news:index'))
+
+        with mock.patch.dict('news.templatetags.translation_tags.TRANSLATIONS', {'uk': {}}):
+            ukrainian = self.client.get(reverse('news:index'))
+        self.client.cookies['django_language'] = 'en'
+        english = self.client.get(reverse('news:index'))
+
+        self.assertContains(ukrainian, 'Усі категорії')
+        self.assertContains(english, 'All Categories')
+
+
+class AnonymousPageCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_guest_page_is_served_before_the_view(self, get):
+        """Second guest with the same language and filters does not run the view"""
+        get.return_value = make_api_response([API_ARTICLE])
+        url = reverse('news:index') + '?category=business'
+
+        first = self.client.get(url)
+        with mock.patch('news.views.IngestionService.astored_feed') as stored_feed:
+            second = Client(enforce_csrf_checks=True).get(url + '&page=1&utm_source=mail')
+
+        stored_feed.assert_not_called()
+        self.assertEqual(second.status_code, 200)
+        self.assertContains(second, API_ARTICLE['title'])
+        self.assertNotContains(second, CSRF_PLACEHOLDER.decode())
+        self.assertIn('csrftoken', second.cookies)
+        self.assertNotEqual(first.cookies['csrftoken'].value, second.cookies['csrftoken'].value)
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_pages_vary_by_language_and_ingestion(self, get):
+        """Other language and a refreshed feed are rendered again"""
+        get.return_value = make_api_response([API_ARTICLE])
+        self.client.get(reverse('news:index'))
+
+        with mock.patch('news.views.IngestionService.astored_feed', return_value=None) as stored_feed:
+            self.client.cookies['django_language'] = 'uk'
+            self.client.get(reverse('news:index'))
+            # Another process ingested: the version comes from the database once the cached one expires
+            NewsArticle.objects.create(title='New', url='https://example.com/new', fetched_at=timezone.now())
+            self.client.get(reverse('news:index'))
+            cache.delete(IngestionService.FEED_VERSION_KEY)
+            self.client.get(reverse('news:index'))
+
+        self.assertEqual(stored_feed.call_count, 2)
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_logged_in_pages_are_not_cached(self, get):
+        """Users never get guest pages and their pages are not stored"""
+        get.return_value = make_api_response([API_ARTICLE])
+        self.client.get(reverse('news:index'))
+        self.client.login(username='testuser', password='testpass123')
+
+        with mock.patch('news.views.IngestionService.astored_feed', return_value=None) as stored_feed:
+            response = self.client.get(reverse('news:index'))
+            self.client.get(reverse('news:index'))
+
+        self.assertEqual(stored_feed.call_count, 2)
+        self.assertContains(response, 'user-avatar')
+
+
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.article = NewsArticle.objects.create(
+            title='Stored', url='https://example.com/stored', category='business', fetched_at=timezone.now(),
+        )
+
+    def test_unchanged_feed_is_not_rendered_again(self):
+        """Matching ETag gets 304 without rendering, a new save changes it"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('news:index'))
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+
+        with mock.patch('news.views.render') as render:
+            not_modified = self.client.get(reverse('news:index'), HTTP_IF_NONE_MATCH=etag)
+        render.assert_not_called()
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], etag)
+
+        SavedArticle.objects.create(user=self.user, article=self.article)
+        SavedURLSet.invalidate(self.user.pk)
+        response = self.client.get(reverse('news:index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_last_modified_does_not_go_back(self):
+        """A page that returns to an earlier version is not answered 304 by If-Modified-Since"""
+        self.client.login(username='testuser', password='testpass123')
+        with mock.patch('news.conditional.time.time', return_value=1_000_000):
+            self.client.get(reverse('news:index'))
+        with mock.patch('news.conditional.time.time', return_value=2_000_000):
+            SavedArticle.objects.create(user=self.user, article=self.article)
+            SavedURLSet.invalidate(self.user.pk)
+            saved = self.client.get(reverse('news:index'))
+
+            SavedArticle.objects.filter(user=self.user).delete()
+            SavedURLSet.invalidate(self.user.pk)
+            response = self.client.get(reverse('news:index'), HTTP_IF_MODIFIED_SINCE=saved['Last-Modified'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(parse_http_date(response['Last-Modified']), parse_http_date(saved['Last-Modified']))
+
+    def test_guest_pages_keep_validators_in_page_cache(self):
+        """Cached guest pages answer If-Modified-Since without the view"""
+        response = self.client.get(reverse('news:index'))
+        last_modified = response['Last-Modified']
+
+        with mock.patch('news.views.IngestionService.astored_feed') as stored_feed:
+            cached = self.client.get(reverse('news:index'))
+            not_modified = self.client.get(reverse('news:index'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        stored_feed.assert_not_called()
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    @mock.patch('news.services.AsyncHTTPClient.get')
+    def test_newsapi_pages_have_no_validators(self, get):
+        """Feeds that fell back to NewsAPI are always rendered"""
+        get.return_value = make_api_response([API_ARTICLE])
+        response = self.client.get(reverse('news:index') + '?category=sports')
+
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_article_detail_not_modified(self):
+        """Detail page is validated by article digest and saved state"""
+        url = reverse('news:article_detail', kwargs={'article_id': self.article.short_id})
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        NewsArticle.objects.filter(pk=self.article.pk).update(title='Updated')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    @mock.patch('news.views.TranslationService.atranslate_article')
+    def test_translated_detail_not_modified_before_translating(self, translate):
+        """A revalidated translation is answered without translating again"""
+        translate.side_effect = lambda data, lang: {**data, 'title': f'{lang}:{data["title"]}'}
+        url = reverse('news:article_detail', kwargs={'article_id': self.article.short_id}) + '?translate=uk'
+        etag = self.client.get(url)['ETag']
+        translate.reset_mock()
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        translate.assert_not_called()
+        other = self.client.get(url.replace('uk', 'de'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+
+    @mock.patch('news.views.TranslationService.atranslate_article')
+    def test_failed_translation_is_not_validated(self, translate):
+        """A page that kept the original text gets no validators"""
+        translate.side_effect = lambda data, lang: data
+        url = reverse('news:article_detail', kwargs={'article_id': self.article.short_id}) + '?translate=uk'
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+
+def make_image_response(width=2000, height=1000, content_type='image/jpeg'):
+    body = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(body, 'JPEG')
+    headers = {'Content-Type': content_type} if content_type else {}
+    response = mock.MagicMock(status_code=200, headers=headers, is_redirect=False)
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [body.getvalue()]
+    return response
+
+
+def make_redirect_response(location):
+    response = mock.MagicMock(status_code=302, headers={'Location': location}, is_redirect=True)
+    response.__enter__.return_value = response
+    return response
+
+
+class ImageProxyTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = override_settings(NEWS_IMAGE_CACHE_DIR=self.directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        ImageProxy._cache_bytes = None
+        # Host name to address, other names resolve to a public address
+        self.addresses = {}
+        patcher = mock.patch('news.images.socket.getaddrinfo', side_effect=self.getaddrinfo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(ImageProxy, 'session')
+        self.get = patcher.start().return_value.get
+        self.addCleanup(patcher.stop)
+
+    def proxy_url(self, url, size='card'):
+        return reverse('news:image_proxy', args=[size, ImageProxy.sign(url)])
+
+    def getaddrinfo(self, host, port, **kwargs):
+        try:
+            address = str(ipaddress.ip_address(host))
+        except ValueError:
+            address = self.addresses.get(host, '93.184.216.34')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port))]
+
+    def connect_through_adapter(self):
+        """Sends downloads through the real transport, returns the mock that refuses its connections"""
+        session = requests.Session()
+        session.mount('http://', PublicAddressAdapter())
+        session.mount('https://', PublicAddressAdapter())
+        self.get.side_effect = session.get
+        patcher = mock.patch('urllib3.util.connection.create_connection', side_effect=OSError('refused'))
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_image_is_resized_once(self):
+        """Original is fetched once and served resized with long cache headers"""
+        get = self.get
+        get.return_value = make_image_response()
+        url = self.proxy_url('https://example.com/photo.jpg')
+
+        first = self.client.get(url)
+        second = self.client.get(url)
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(second['Content-Type'], 'image/webp')
+        self.assertIn('immutable', second['Cache-Control'])
+        image = Image.open(io.BytesIO(b''.join(first.streaming_content)))
+        self.assertEqual(image.size, (640, 320))
+
+    def test_dead_and_unsigned_images(self):
+        """Broken images are not fetched again, foreign URLs are never fetched"""
+        get = self.get
+        get.return_value = make_image_response(content_type='text/html')
+        url = self.proxy_url('https://example.com/missing.jpg')
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        forged = reverse('news:image_proxy', args=['card', 'https:example.com'])
+        self.assertEqual(self.client.get(forged).status_code, 404)
+        self.assertEqual(get.call_count, 1)
+
+    def test_least_recently_used_images_are_evicted(self):
+        """Cache directory is trimmed starting with files not served for longest"""
+        get = self.get
+        get.side_effect = lambda *args, **kwargs: make_image_response()
+        old, recent, new = (f'https://example.com/{name}.jpg' for name in ('old', 'recent', 'new'))
+        ImageProxy.open(old, 'card').close()
+        ImageProxy.open(recent, 'card').close()
+        os.utime(ImageProxy.path(old, 'card'), (2, 2))
+        os.utime(ImageProxy.path(recent, 'card'), (1, 1))
+        ImageProxy.open(recent, 'card').close()
+
+        size = ImageProxy.path(recent, 'card').stat().st_size
+        with override_settings(NEWS_IMAGE_CACHE_MAX_BYTES=size * 2.5):
+            ImageProxy.open(new, 'card').close()
+
+        self.assertFalse(ImageProxy.path(old, 'card').exists())
+        self.assertTrue(ImageProxy.path(recent, 'card').exists())
+        self.assertTrue(ImageProxy.path(new, 'card').exists())
+
+    def test_internal_addresses_are_not_fetched(self):
+        """Image URLs resolving to loopback, private or link-local addresses are refused"""
+        create_connection = self.connect_through_adapter()
+        self.addresses.update({'metadata.internal': '169.254.169.254', 'intranet': '10.0.0.5', 'v6': '::1'})
+        for url in (
+            'http://127.0.0.1:8000/admin/',
+            'http://metadata.internal/latest/meta-data/',
+            'http://intranet/photo.jpg',
+            'http://v6/photo.jpg',
+            'file:///etc/passwd',
+        ):
+            self.assertIsNone(ImageProxy.open(url, 'card'))
+        create_connection.assert_not_called()
+
+    def test_connection_goes_to_checked_address(self):
+        """The host is resolved once and the socket connects to the checked address"""
+        create_connection = self.connect_through_adapter()
+        answers = iter(['93.184.216.34', '127.0.0.1'])
+        self.addresses = mock.Mock(get=lambda host, default: next(answers))
+
+        self.assertIsNone(ImageProxy.open('https://rebind.example.com/photo.jpg', 'card'))
+
+        self.assertEqual(create_connection.call_args.args[0], ('93.184.216.34', 443))
+
+    def test_redirects_are_checked(self):
+        """Every redirect hop must be public too"""
+        self.addresses['localhost'] = '127.0.0.1'
+        self.get.side_effect = [
+            make_redirect_response('/moved.jpg'),
+            make_image_response(),
+        ]
+        self.assertIsNotNone(ImageProxy.open('https://example.com/photo.jpg', 'card'))
+        self.assertEqual(self.get.call_args.args[0], 'https://example.com/moved.jpg')
+        self.assertFalse(self.get.call_args.kwargs['allow_redirects'])
+
+        self.get.reset_mock()
+        self.get.side_effect = [make_redirect_response('file:///etc/passwd')]
+        self.assertIsNone(ImageProxy.open('https://example.com/other.jpg', 'card'))
+        self.assertEqual(self.get.call_count, 1)
+
+        # The next hop opens its own connection, which checks the new host
+        create_connection = self.connect_through_adapter()
+        fetch = self.get.side_effect
+        responses = iter([make_redirect_response('http://localhost/secret')])
+        self.get.side_effect = lambda url, **kwargs: next(responses, None) or fetch(url, **kwargs)
+        self.assertIsNone(ImageProxy.open('https://example.com/third.jpg', 'card'))
+        create_connection.assert_not_called()
+
+    def test_untyped_and_oversized_images_are_refused(self):
+        """Responses without Content-Type and images over NEWS_IMAGE_MAX_PIXELS are not decoded"""
+        self.get.return_value = make_image_response(content_type=None)
+        self.assertIsNone(ImageProxy.open('https://example.com/untyped', 'card'))
+
+        self.get.return_value = make_image_response(width=1000, height=1000)
+        with override_settings(NEWS_IMAGE_MAX_PIXELS=100_000):
+            self.assertIsNone(ImageProxy.open('https://example.com/huge.jpg', 'card'))
+        # 1/2 scale draft decoding keeps a 1280x1280 box covered
+        self.get.return_value = make_image_response(width=4000, height=3000)
+        with override_settings(NEWS_IMAGE_MAX_PIXELS=4_000_000):
+            self.assertIsNotNone(ImageProxy.open('https://example.com/large.jpg', 'detail'))
+
+
+class BulkSaveTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def post(self, articles):
+        return self.client.post(reverse('news:save_articles'), articles, content_type='application/json')
+
+    def articles(self, count):
+        return [
+            {'url': f'https://example.com/{index}', 'title': f'Article {index}', 'category': 'science',
+             'source_id': 'bbc-news', 'published_at': '2024-01-01T10:00:00Z'}
+            for index in range(count)
+        ]
+
+    def test_query_count_does_not_grow_with_batch(self):
+        """Any number of articles is saved with the same set-based queries"""
+        with CaptureQueriesContext(connection) as small:
+            self.post(self.articles(2))
+        SavedArticle.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            response = self.post(self.articles(30))
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.json()['saved']), 30)
+        saved = SavedArticle.objects.get(user=self.user, article__url='https://example.com/7')
+        self.assertEqual((saved.category, saved.source_id), ('science', 'bbc-news'))
+
+    def test_existing_saves_and_invalid_articles_are_reported(self):
+        """Known articles are reused and nothing is saved twice"""
+        article = NewsArticle.objects.create(title='Known', url='https://example.com/0', category='business')
+        SavedArticle.objects.create(user=self.user, article=article)
+        saved_urls = SavedURLSet.for_user(self.user)
+
+        response = self.post(self.articles(2) + [{'url': 'javascript:alert(1)', 'title': 'x'}, 'oops'])
+
+        self.assertEqual(response.json(), {
+            'saved': ['https://example.com/1'],
+            'already_saved': ['https://example.com/0'],
+            'invalid': [2, 3],
+        })
+        self.assertEqual(NewsArticle.objects.count(), 2)
+        self.assertNotIn('https://example.com/1', saved_urls)
+        self.assertIn('https://example.com/1', SavedURLSet.for_user(self.user))
+
+    def test_rejects_bad_requests(self):
+        """Only POSTed JSON lists within the limit are accepted"""
+        self.assertEqual(self.client.get(reverse('news:save_articles')).status_code, 405)
+        self.assertEqual(self.post('not json').status_code, 400)
+        with override_settings(NEWS_BULK_SAVE_MAX_ARTICLES=3):
+            self.assertEqual(self.post(self.articles(4)).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.post(self.articles(1)).status_code, 302)
+
+
+WIRE_STORY = {
+    'title': 'Federal Reserve holds interest rates steady as inflation cools - Reuters',
+    'description': 'The Federal Reserve kept its benchmark interest rate unchanged on Wednesday, citing slowing '
+                   'inflation and a resilient labor market, and signalled it could cut rates later this year.',
+    'content': '',
+    'url': 'https://reuters.example.com/fed',
+    'source': {'id': 'reuters', 'name': 'Reuters'},
+}
+
+
+class NearDuplicateTestCase(TestCase):
+
+    def setUp(self):
+        stories.clear()
+        self.addCleanup(setattr, stories, 'warmed', stories.warmed)
+
+    def rewrite(self, **changes):
+        return dict(WIRE_STORY, url='https://bbc.example.com/fed', source={'id': 'bbc-news', 'name': 'BBC News'},
+                    **changes)
+
+    def test_rewrites_of_a_story_share_a_cluster(self):
+        """Source suffixes and small edits keep the story, other stories get their own"""
+        index = NearDuplicateIndex()
+        processed = list(pipeline.process([WIRE_STORY], stages=pipeline.STAGES[:-1]))[0]
+        story = index.cluster(minhash(story_text(processed)))
+
+        rewrite = self.rewrite(
+            title='Fed holds interest rates steady as inflation cools - BBC News',
+            description=WIRE_STORY['description'].replace('on Wednesday', 'on Wednesday afternoon'),
+        )
+        other = dict(WIRE_STORY, title='Federal Reserve raises interest rates to fight inflation',
+                     description='The Federal Reserve raised its benchmark rate by a quarter point on Wednesday.')
+        rewrite, other = pipeline.process([rewrite, other], stages=pipeline.STAGES[:-1])
+
+        self.assertEqual(index.cluster(minhash(story_text(rewrite))), story)
+        self.assertNotEqual(index.cluster(minhash(story_text(other))), story)
+        self.assertEqual(len(index), 3)
+
+    def test_feeds_show_a_story_once(self):
+        """Repeats are dropped within a feed and tagged with the same story across feeds"""
+        first = list(pipeline.process([WIRE_STORY, self.rewrite(title='Federal Reserve holds interest rates '
+                                                                      'steady as inflation cools - BBC News')]))
+        second = list(pipeline.process([self.rewrite()]))
+
+        self.assertEqual([article['url'] for article in first], [WIRE_STORY['url']])
+        self.assertEqual(second[0]['story'], first[0]['story'])
+
+    def test_stored_feed_shows_newest_article_of_story(self):
+        """Every source keeps its article, mixed feeds show the story once"""
+        IngestionService.store(pipeline.process([dict(WIRE_STORY, publishedAt='2025-01-01T10:00:00Z')]),
+                               category='business')
+        IngestionService.store(pipeline.process([self.rewrite(publishedAt='2025-01-01T11:00:00Z')]),
+                               source_id='bbc-news')
+        NewsArticle.objects.filter(source_id='bbc-news').update(category='business')
+
+        self.assertEqual(NewsArticle.objects.values('story').distinct().count(), 1)
+        self.assertEqual(NewsArticle.objects.count(), 2)
+        feed = IngestionService.stored_feed(category='business')
+        self.assertEqual([article['url'] for article in feed], ['https://bbc.example.com/fed'])
+        feed = IngestionService.stored_feed(source='reuters')
+        self.assertEqual([article['url'] for article in feed], [WIRE_STORY['url']])
+
+    def test_restarted_process_keeps_stored_stories(self):
+        """After a restart rewrites join the stored story and re-ingesting does not reassign it"""
+        IngestionService.store(pipeline.process([WIRE_STORY]), category='business')
+        story = NewsArticle.objects.get().story
+
+        stories.clear()
+        stories.warmed = False
+        self.assertEqual(IngestionService.warm_stories(), 1)
+        self.assertEqual(IngestionService.warm_stories(), 0)
+        self.assertEqual(list(pipeline.process([self.rewrite()]))[0]['story'], story)
+
+        stories.clear()
+        edited = dict(WIRE_STORY, description='A different summary of the decision taken by the central bank today.')
+        processed = list(pipeline.process([edited]))
+        self.assertNotEqual(processed[0]['story'], story)
+        IngestionService.store(processed, category='business')
+        article = NewsArticle.objects.get()
+        self.assertEqual(article.description, edited['description'])
+        self.assertEqual(article.story, story)
@@ -1,40 +1,295 @@
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
 from googletrans import Translator
 
+from .http_client import HTTPClient
+from .models import Translation
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU mapping"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _Job:
+    """Remote translation of one text. The worker stores the result itself
+    if the caller stopped waiting for it"""
+
+    def __init__(self, text):
+        self.text = text
+        self.result = None
+        self.abandoned = False
+        self.lock = threading.Lock()
+
 
 class TranslationService:
     """Text translation service"""
+    SERVICE_URL = 'https://translate.google.com'
+    FIELDS = ('title', 'description', 'content')
 
-    @staticmethod
-    def translate_article(article_data, dest_lang='uk'):
+    _translator = None
+    _lock = threading.Lock()
+    _pending = 0
+    memory = LRUCache(getattr(settings, 'TRANSLATION_LRU_SIZE', 2048))
+    # googletrans has no async or batch API, so fields are translated in parallel threads
+    executor = ThreadPoolExecutor(
+        max_workers=getattr(settings, 'TRANSLATION_WORKERS', 8),
+        thread_name_prefix='translation'
+    )
+
+    @classmethod
+    def translator(cls):
+        """Returns shared Translator, so its keep-alive connections are reused between requests"""
+        if cls._translator is None:
+            with cls._lock:
+                if cls._translator is None:
+                    cls._translator = Translator(timeout=settings.HTTP_TIMEOUT)
+        return cls._translator
+
+    @classmethod
+    def translate_text(cls, text, dest_lang, src_lang='auto'):
+        """Translates text. Returns the original text if translation failed or timed out"""
+        return cls.translate_texts([text], dest_lang, src_lang)[text]
+
+    @classmethod
+    def translate_texts(cls, texts, dest_lang, src_lang='auto'):
+        """Translates several texts at once, returns mapping of original text to translation.
+
+        Known translations come from memory and one database query. The rest are
+        requested concurrently and waited for TRANSLATION_FIELD_TIMEOUT in total.
+        Texts that are not translated by then keep the original text.
+        """
+        texts = set(texts)
+        found = cls._from_memory(texts, src_lang, dest_lang)
+        missing = texts - found.keys()
+
+        if missing:
+            found.update(cls._from_database(missing, src_lang, dest_lang))
+            missing = texts - found.keys()
+
+        if missing:
+            futures = cls._submit(missing, src_lang, dest_lang)
+            wait(futures, timeout=settings.TRANSLATION_FIELD_TIMEOUT)
+            fresh = cls._collect(futures)
+            cls._save(fresh, src_lang, dest_lang)
+            found.update(fresh)
+
+        return {text: found.get(text, text) for text in texts}
+
+    @classmethod
+    async def atranslate_texts(cls, texts, dest_lang, src_lang='auto'):
+        """Async version of translate_texts"""
+        texts = set(texts)
+        found = cls._from_memory(texts, src_lang, dest_lang)
+        missing = texts - found.keys()
+
+        if missing:
+            rows = Translation.objects.filter(
+                text_hash__in=[cls._hash(text) for text in missing],
+                source_lang=src_lang,
+                target_lang=dest_lang,
+            ).values_list('text_hash', 'translated_text')
+            found.update(cls._match(missing, [row async for row in rows], src_lang, dest_lang))
+            missing = texts - found.keys()
+
+        if missing:
+            futures = cls._submit(missing, src_lang, dest_lang)
+            if futures:
+                await asyncio.wait(
+                    [asyncio.wrap_future(future) for future in futures],
+                    timeout=settings.TRANSLATION_FIELD_TIMEOUT
+                )
+            fresh = cls._collect(futures)
+            await Translation.objects.abulk_create(cls._rows(fresh, src_lang, dest_lang), ignore_conflicts=True)
+            found.update(fresh)
+
+        return {text: found.get(text, text) for text in texts}
+
+    @classmethod
+    def translate_article(cls, article_data, dest_lang='uk'):
         """News article translation method"""
-        translated = article_data.copy()
+        try:
+            translations = cls.translate_texts(cls._article_texts(article_data), dest_lang)
+            return cls._apply(article_data, translations)
+        except Exception as e:
+            print(f'Article translation error: {e}')
+            return article_data
 
+    @classmethod
+    async def atranslate_article(cls, article_data, dest_lang='uk'):
+        """Async version of translate_article"""
         try:
-            translator = Translator()
-
-            if article_data.get('title'):
-                translated['title'] = translator.translate(
-                    article_data['title'],
-                    dest=dest_lang
-                ).text
-
-            if article_data.get('description'):
-                translated['description'] = translator.translate(
-                    article_data['description'],
-                    dest=dest_lang
-                ).text
-
-            if article_data.get('content'):
-                translated['content'] = translator.translate(
-                    article_data['content'],
-                    dest=dest_lang
-                ).text
-
-            return translated
+            translations = await cls.atranslate_texts(cls._article_texts(article_data), dest_lang)
+            return cls._apply(article_data, translations)
         except Exception as e:
             print(f'Article translation error: {e}')
             return article_data
 
+    @classmethod
+    def _article_texts(cls, article_data):
+        return [article_data[field] for field in cls.FIELDS if article_data.get(field)]
+
+    @classmethod
+    def _apply(cls, article_data, translations):
+        translated = article_data.copy()
+        for field in cls.FIELDS:
+            if article_data.get(field):
+                translated[field] = translations[article_data[field]]
+        return translated
+
+    @classmethod
+    def _from_memory(cls, texts, src_lang, dest_lang):
+        found = {}
+        for text in texts:
+            translated = cls.memory.get(cls._key(text, src_lang, dest_lang))
+            if translated is not None:
+                found[text] = translated
+        return found
+
+    @classmethod
+    def _from_database(cls, texts, src_lang, dest_lang):
+        rows = Translation.objects.filter(
+            text_hash__in=[cls._hash(text) for text in texts],
+            source_lang=src_lang,
+            target_lang=dest_lang,
+        ).values_list('text_hash', 'translated_text')
+        return cls._match(texts, rows, src_lang, dest_lang)
+
+    @classmethod
+    def _match(cls, texts, rows, src_lang, dest_lang):
+        by_hash = dict(rows)
+        found = {}
+        for text in texts:
+            translated = by_hash.get(cls._hash(text))
+            if translated is not None:
+                found[text] = translated
+                cls.memory.set(cls._key(text, src_lang, dest_lang), translated)
+        return found
+
+    @classmethod
+    def _submit(cls, texts, src_lang, dest_lang):
+        """Starts remote translations, unless TRANSLATION_QUEUE_SIZE of them are
+        already queued or running. Texts left out keep the original text"""
+        futures = {}
+        for text in texts:
+            with cls._lock:
+                if cls._pending >= settings.TRANSLATION_QUEUE_SIZE:
+                    print('Translation queue is full')
+                    break
+                cls._pending += 1
+            job = _Job(text)
+            future = cls.executor.submit(cls._run, job, src_lang, dest_lang)
+            future.add_done_callback(cls._release)
+            futures[future] = job
+        return futures
+
+    @classmethod
+    def _release(cls, future):
+        with cls._lock:
+            cls._pending -= 1
+
+    @classmethod
+    def _run(cls, job, src_lang, dest_lang):
+        translated = cls._translate_remote(job.text, dest_lang, src_lang)
+        cls.memory.set(cls._key(job.text, src_lang, dest_lang), translated)
+        with job.lock:
+            job.result = translated
+            abandoned = job.abandoned
+        if abandoned:
+            cls._save_late(job.text, translated, src_lang, dest_lang)
+        return translated
+
+    @classmethod
+    def _save_late(cls, text, translated, src_lang, dest_lang):
+        """Stores a translation that arrived after the request was answered. Runs in a worker thread"""
+        try:
+            cls._save({text: translated}, src_lang, dest_lang)
+        except Exception as e:
+            print(f'Error saving translation: {e}')
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def _collect(futures):
+        """Returns translations that are ready. Queued jobs are cancelled, running
+        ones are left to the worker, which stores their result when it arrives"""
+        results = {}
+        for future, job in futures.items():
+            if future.cancel():
+                continue
+            if future.done() and future.exception() is not None:
+                print(f'Translation error: {future.exception()}')
+                continue
+            with job.lock:
+                if job.result is None:
+                    job.abandoned = True
+                else:
+                    results[job.text] = job.result
+        return results
+
+    @classmethod
+    def _save(cls, translations, src_lang, dest_lang):
+        Translation.objects.bulk_create(cls._rows(translations, src_lang, dest_lang), ignore_conflicts=True)
+
+    @classmethod
+    def _rows(cls, translations, src_lang, dest_lang):
+        return [
+            Translation(
+                text_hash=cls._hash(text),
+                source_lang=src_lang,
+                target_lang=dest_lang,
+                translated_text=translated,
+            )
+            for text, translated in translations.items()
+        ]
+
+    @classmethod
+    def _translate_remote(cls, text, dest_lang, src_lang):
+        return HTTPClient.call_with_retries(
+            cls.SERVICE_URL,
+            cls.translator().translate,
+            text,
+            dest=dest_lang,
+            src=src_lang
+        ).text
+
+    @staticmethod
+    def _hash(text):
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @classmethod
+    def _key(cls, text, src_lang, dest_lang):
+        return cls._hash(text), src_lang, dest_lang
+
 
 TRANSLATION_LANGUAGES = [
     ('uk', 'Українська'),
@@ -1,13 +1,29 @@
-from django.urls import path
+from django.urls import path, register_converter
 from . import views
+from .models import ARTICLE_ID_LENGTH
+
+
+class ArticleIdConverter:
+    """Public article id (models.article_id), lowercase hex of a fixed length"""
+    regex = f'[0-9a-f]{{{ARTICLE_ID_LENGTH}}}'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+register_converter(ArticleIdConverter, 'article_id')
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.index, name='index'),
-    path('article/<path:article_url>/', views.article_detail, name='article_detail'),
+    path('article/<article_id:article_id>/', views.article_detail, name='article_detail'),
     path('save/', views.save_article, name='save_article'),
+    path('save/bulk/', views.save_articles, name='save_articles'),
     path('remove/<int:article_id>/', views.remove_article, name='remove_article'),
     path('read-later/', views.read_later, name='read_later'),
-    path('store-article/', views.store_article_in_session, name='store_article'),
+    path('image/<slug:size>/<str:token>/', views.image_proxy, name='image_proxy'),
 ]
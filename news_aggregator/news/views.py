@@ -1,40 +1,92 @@
+import json
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
 from django.utils.translation import gettext as _
-from django.core.paginator import Paginator
-from .models import NewsArticle, SavedArticle
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_POST
+from .models import NewsArticle, SavedArticle, url_digest
 from .services import NewsAPIService, CATEGORIES, SOURCES
+from .ingestion import IngestionService
+from .search import LocalSearchService
+from .saved import SavedURLSet, bulk_save, saved_facets, validate_url
+from .article_store import ArticleStore
+from .pagination import KeysetPaginator
+from .page_cache import cache_anonymous_page
+from .conditional import PageValidators
+from .images import ImageProxy
 from .translations import TranslationService, TRANSLATION_LANGUAGES
 
 
-def index(request):
+async def _aget_user(request):
+    """Loads lazy request.user outside of the event loop, as Django 4.2 has no request.auser()"""
+    def load():
+        request.user.is_authenticated
+        return request.user
+
+    return await sync_to_async(load)()
+
+
+@cache_anonymous_page('category', 'source', 'search', 'page')
+async def index(request):
     """Main page with news articles"""
-    if request.user.is_authenticated and request.user.is_superuser:
+    user = await _aget_user(request)
+    if user.is_authenticated and user.is_superuser:
         return redirect('admin:index')
     category = request.GET.get('category', '')
     source = request.GET.get('source', '')
     search_query = request.GET.get('search', '')
     page = request.GET.get('page', 1)
 
+    saved_urls = SavedURLSet()
+    if user.is_authenticated:
+        saved_urls = await SavedURLSet.afor_user(user)
+
+    # Only pages built from stored articles get validators, NewsAPI results can change any time
+    local = True
     if search_query:
-        articles = NewsAPIService.search_news(
-            query=search_query,
-            page=page
-        )
+        articles = await LocalSearchService.asearch(search_query, page=page)
+        if articles is None:
+            local = False
+            articles = await NewsAPIService.asearch_news(
+                query=search_query,
+                page=page
+            )
     else:
-        articles = NewsAPIService.fetch_top_headlines(
-            category=category if category else None,
-            source=source if source else None,
+        articles = await IngestionService.astored_feed(
+            category=category,
+            source=source,
             page=page
         )
-
-    saved_urls = []
-    if request.user.is_authenticated:
-        saved_urls = list(
-            request.user.saved_articles.values_list('url', flat=True)
-        )
+        if articles is None:
+            local = False
+            articles = await NewsAPIService.afetch_top_headlines(
+                category=category if category else None,
+                source=source if source else None,
+                page=page
+            )
+
+    validators = None
+    if articles:
+        # Cards are cached per article, so the feed context is resolved before rendering
+        for article in articles:
+            article['category'] = article.get('category') or category
+            article['source_id'] = article.get('source_id') or source
+        articles = await ArticleStore.aput_many(articles)
+
+        if local:
+            validators = await PageValidators.acompute(
+                request, user, *((article['digest'], article['url'] in saved_urls) for article in articles)
+            )
+            not_modified = await validators.anot_modified(request)
+            if not_modified:
+                return not_modified
 
     context = {
         'articles': articles,
@@ -45,19 +97,21 @@ def index(request):
         'selected_source': source,
         'search_query': search_query,
         'current_page': int(page),
+        'fragment_cache_ttl': settings.NEWS_FRAGMENT_CACHE_TTL,
     }
 
-    return render(request, 'news/index.html', context)
+    response = await sync_to_async(render)(request, 'news/index.html', context)
+    return validators.apply(request, response) if validators else response
 
 
-def article_detail(request, article_url):
+async def article_detail(request, article_id):
     """News article detail page"""
-    if request.user.is_authenticated and request.user.is_superuser:
+    user = await _aget_user(request)
+    if user.is_authenticated and user.is_superuser:
         return redirect('admin:index')
 
-    article = None
-    try:
-        article = NewsArticle.objects.get(url=article_url)
+    article = await NewsArticle.objects.filter(url_hash__startswith=article_id).afirst()
+    if article:
         article_data = {
             'title': article.title,
             'description': article.description,
@@ -65,23 +119,38 @@ def article_detail(request, article_url):
             'url': article.url,
             'image_url': article.image_url,
             'source': article.source,
+            'source_id': article.source_id,
+            'category': article.category,
         }
-    except NewsArticle.DoesNotExist:
-        article_data = request.session.get('current_article')
+    else:
+        article_data = await ArticleStore.aget(article_id)
         if not article_data:
             messages.error(request, _('Article not found.'))
             return redirect('news:index')
 
-    translate_to = request.GET.get('translate')
-    if translate_to:
-        article_data = TranslationService.translate_article(article_data, translate_to)
-
     is_saved = False
-    if request.user.is_authenticated and article:
-        is_saved = SavedArticle.objects.filter(
-            user=request.user,
+    if user.is_authenticated and article:
+        is_saved = await SavedArticle.objects.filter(
+            user=user,
             article=article
-        ).exists()
+        ).aexists()
+
+    # Validators are checked before translating, the query string already names the language
+    translate_to = request.GET.get('translate')
+    validators = await PageValidators.acompute(request, user, ArticleStore.digest(article_data), is_saved)
+    not_modified = await validators.anot_modified(request)
+    if not_modified:
+        return not_modified
+
+    translated = True
+    if translate_to:
+        original = article_data
+        article_data = await TranslationService.atranslate_article(original, translate_to)
+        # A field that kept its text may have failed to translate, such a page must not be validated later
+        translated = all(
+            article_data[field] != original[field]
+            for field in TranslationService.FIELDS if original.get(field)
+        )
 
     context = {
         'article': article_data,
@@ -90,7 +159,11 @@ def article_detail(request, article_url):
         'current_lang': translate_to or '',
     }
 
-    return render(request, 'news/detail.html', context)
+    response = await sync_to_async(render)(request, 'news/detail.html', context)
+    if not translated:
+        patch_cache_control(response, no_cache=True)
+        return response
+    return validators.apply(request, response)
 
 
 @login_required
@@ -107,17 +180,32 @@ def save_article(request):
             'url': request.POST.get('url'),
             'image_url': request.POST.get('image_url'),
             'source': request.POST.get('source'),
+            'source_id': request.POST.get('source_id') or '',
         }
+        try:
+            validate_url(article_data['url'] or '')
+        except ValidationError:
+            messages.error(request, _('Article has no valid link and cannot be saved.'))
+            return redirect('news:index')
+
+        category = request.POST.get('category', '')
+        if category not in dict(CATEGORIES):
+            category = ''
 
         article, created = NewsArticle.objects.get_or_create(
-            url=article_data['url'],
+            url_hash=url_digest(article_data['url']),
             defaults=article_data
         )
 
         saved, created = SavedArticle.objects.get_or_create(
             user=request.user,
-            article=article
+            article=article,
+            defaults={
+                'category': category or article.category,
+                'source_id': article_data['source_id'] or article.source_id,
+            }
         )
+        SavedURLSet.invalidate(request.user.pk)
 
         if created:
             messages.success(request, _('Article added to reading list!'))
@@ -129,11 +217,33 @@ def save_article(request):
     return redirect('news:index')
 
 
+@login_required
+@require_POST
+def save_articles(request):
+    """Saves a JSON list of feed articles to read later list at once"""
+    if request.user.is_superuser:
+        return JsonResponse({'error': 'Superusers have no reading list.'}, status=403)
+
+    try:
+        articles = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Request body must be JSON.'}, status=400)
+    if not isinstance(articles, list) or not 0 < len(articles) <= settings.NEWS_BULK_SAVE_MAX_ARTICLES:
+        return JsonResponse(
+            {'error': f'Expected a list of 1 to {settings.NEWS_BULK_SAVE_MAX_ARTICLES} articles.'},
+            status=400,
+        )
+
+    saved, already_saved, invalid = bulk_save(request.user, articles)
+    return JsonResponse({'saved': saved, 'already_saved': already_saved, 'invalid': invalid})
+
+
 @login_required
 def remove_article(request, article_id):
     """Removing news article from list"""
     article = get_object_or_404(NewsArticle, id=article_id)
     SavedArticle.objects.filter(user=request.user, article=article).delete()
+    SavedURLSet.invalidate(request.user.pk)
     messages.success(request, _('Article removed from reading list.'))
     return redirect('news:read_later')
 
@@ -150,18 +260,27 @@ def read_later(request):
     source = request.GET.get('source', '')
 
     if category:
-        saved_articles = saved_articles.filter(article__category=category)
+        saved_articles = saved_articles.filter(category=category)
     if source:
-        saved_articles = saved_articles.filter(article__source=source)
+        saved_articles = saved_articles.filter(source_id=source)
 
-    paginator = Paginator(saved_articles, 20)
-    page = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page)
+    category_counts, source_counts = saved_facets(request.user)
+
+    paginator = KeysetPaginator(
+        saved_articles, 20, 'saved_at',
+        count_cap=settings.NEWS_READ_LATER_COUNT_CAP,
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    if not page_obj and 'cursor' in request.GET:
+        # The rows around the cursor were removed, start over with the same filters
+        query = request.GET.copy()
+        del query['cursor']
+        return redirect(f"{reverse('news:read_later')}?{query.urlencode()}" if query else 'news:read_later')
 
     context = {
         'saved_articles': page_obj,
-        'categories': CATEGORIES,
-        'sources': SOURCES,
+        'categories': [(code, name, category_counts.get(code, 0)) for code, name in CATEGORIES],
+        'sources': [(code, name, source_counts.get(code, 0)) for code, name in SOURCES],
         'selected_category': category,
         'selected_source': source,
     }
@@ -169,16 +288,16 @@ def read_later(request):
     return render(request, 'news/read_later.html', context)
 
 
-def store_article_in_session(request):
-    if request.method == 'POST':
-        article_data = {
-            'title': request.POST.get('title'),
-            'description': request.POST.get('description'),
-            'content': request.POST.get('content'),
-            'url': request.POST.get('url'),
-            'image_url': request.POST.get('image_url'),
-            'source': request.POST.get('source'),
-        }
-        request.session['current_article'] = article_data
-        return JsonResponse({'success': True})
-    return JsonResponse({'success': False})
+def image_proxy(request, size, token):
+    """Resized copy of an article image from the local image cache"""
+    url = ImageProxy.unsign(token)
+    if url is None or size not in settings.NEWS_IMAGE_SIZES:
+        raise Http404
+
+    image = ImageProxy.open(url, size)
+    if image is None:
+        raise Http404
+
+    response = FileResponse(image, content_type=ImageProxy.CONTENT_TYPE)
+    patch_cache_control(response, public=True, max_age=settings.NEWS_IMAGE_MAX_AGE, immutable=True)
+    return response
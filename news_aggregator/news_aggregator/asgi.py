@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_aggregator.settings')
 
 application = get_asgi_application()
+
+# The server event loop lives as long as the process, so its outbound connections are pooled
+from news.http_client import AsyncHTTPClient  # noqa: E402
+
+AsyncHTTPClient.event_loop_pool = True
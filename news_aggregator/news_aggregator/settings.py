@@ -128,6 +128,18 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Profile pictures (users.avatars.AvatarProcessor). Uploads are checked against the limits
+# and resized to square variants in the background. Names contain a content hash, so
+# MEDIA_URL/avatars/ can be served with immutable caching
+USERS_AVATAR_SIZES = {
+    'small': 80,
+    'large': 240,
+}
+USERS_AVATAR_MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+USERS_AVATAR_MAX_PIXELS = 40_000_000
+USERS_AVATAR_QUALITY = 85
+USERS_AVATAR_WORKERS = 2
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -142,4 +154,138 @@ LOGIN_URL = 'users:login'
 NEWS_API_KEY = config('NEWS_API_KEY', default='')
 
 SESSION_COOKIE_AGE = 86400 * 30
-SESSION_SAVE_EVERY_REQUEST = True
+# Cache-backed sessions with write-behind database writes (news/sessions.py)
+SESSION_ENGINE = 'news.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+# Sessions are re-saved to extend their expiry only when less than this many seconds are left
+SESSION_REFRESH_REMAINING = 86400 * 7
+SESSION_WRITE_BEHIND_INTERVAL = 5
+SESSION_WRITE_BEHIND_MAX_PENDING = 500
+
+
+def cache_alias(prefix, location, max_entries):
+    """Cache configured by <prefix>_BACKEND, <prefix>_LOCATION and, for the default
+    in-memory backend, <prefix>_MAX_ENTRIES (LocMemCache keeps only 300 otherwise)"""
+    backend = config(f'{prefix}_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+    alias = {'BACKEND': backend, 'LOCATION': config(f'{prefix}_LOCATION', default=location)}
+    if backend.endswith('LocMemCache'):
+        alias['OPTIONS'] = {'MAX_ENTRIES': config(f'{prefix}_MAX_ENTRIES', default=max_entries, cast=int)}
+    return alias
+
+
+CACHES = {
+    'default': cache_alias('CACHE', 'news-aggregator', 10000),
+    # Feed articles opened by id (news.article_store.ArticleStore), kept apart so
+    # pages and fragments in the default cache do not push them out
+    'articles': cache_alias('ARTICLE_CACHE', 'news-articles', 50000),
+    # Sessions (news.sessions). Use a shared backend when running several processes
+    'sessions': cache_alias('SESSION_CACHE', 'news-sessions', 100000),
+}
+
+# Seconds a NewsAPI response stays fresh, per endpoint
+NEWS_API_CACHE_TTL = {
+    'top-headlines': 300,
+    'everything': 900,
+}
+# Seconds an expired response may still be served while it is being refreshed
+NEWS_API_CACHE_STALE_TTL = 3600
+
+# Background ingestion (manage.py ingest_news)
+NEWS_INGEST_INTERVAL = config('NEWS_INGEST_INTERVAL', default=600, cast=int)
+NEWS_INGEST_PAGE_SIZE = 100
+NEWS_INGEST_BATCH_SIZE = 500
+# Stored feeds older than this are not served and index() falls back to NewsAPI
+NEWS_INGEST_MAX_AGE = 1800
+# Unsaved headlines are deleted after this many seconds without being seen in a feed
+NEWS_INGEST_RETENTION = 86400 * 2
+
+# Orphaned article collection (manage.py collect_orphans)
+NEWS_ORPHAN_INTERVAL = config('NEWS_ORPHAN_INTERVAL', default=300, cast=int)
+NEWS_ORPHAN_BATCH_SIZE = 500
+# Unsaved articles younger than this are kept, so a save in progress is not raced
+NEWS_ORPHAN_GRACE = 300
+
+# Articles whose titles and descriptions have at least this estimated Jaccard similarity
+# of words and word pairs are one story (news.dedup). The in-memory index keeps this many
+# signatures
+NEWS_DEDUP_SIMILARITY = 0.5
+NEWS_DEDUP_INDEX_SIZE = 50000
+
+# Shared outbound HTTP pool (news.http_client.HTTPClient)
+HTTP_TIMEOUT = 10
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_SIZE = config('HTTP_POOL_SIZE', default=20, cast=int)
+HTTP_MAX_RETRIES = config('HTTP_MAX_RETRIES', default=2, cast=int)
+HTTP_BACKOFF_FACTOR = 0.3
+HTTP_BACKOFF_JITTER = 0.2
+# Upper bound of concurrent upstream connections per ASGI event loop
+HTTP_ASYNC_MAX_CONNECTIONS = 200
+
+# Collapse identical NewsAPI requests across processes through a cache lock.
+# Needs a cache shared between processes (e.g. Redis or Memcached)
+NEWS_API_CLUSTER_COALESCING = config('NEWS_API_CLUSTER_COALESCING', default=False, cast=bool)
+
+# Translations kept in process memory in front of the database store
+TRANSLATION_LRU_SIZE = 2048
+# Threads translating article fields in parallel and seconds to wait for the
+# fields of one request
+TRANSLATION_WORKERS = 8
+TRANSLATION_FIELD_TIMEOUT = 4
+# Remote translations queued or running at once. Texts over it keep the original text
+TRANSLATION_QUEUE_SIZE = 64
+
+# Searches are answered from stored articles when a page has at least this many
+# matches, otherwise they go to NewsAPI /everything
+NEWS_SEARCH_MIN_RESULTS = 5
+
+# External API health monitor (manage.py monitor_apis)
+HEALTH_CHECK_INTERVAL = config('HEALTH_CHECK_INTERVAL', default=60, cast=int)
+HEALTH_PROBE_TIMEOUT = 5
+# Seconds of history used for latency percentiles and error rate
+HEALTH_WINDOW = 3600
+HEALTH_HISTORY_RETENTION = 86400 * 7
+
+# Seconds a user's saved URL set stays cached (news.saved.SavedURLSet)
+NEWS_SAVED_URLS_TTL = 86400
+
+# Most articles accepted by one bulk save request (news.views.save_articles)
+NEWS_BULK_SAVE_MAX_ARTICLES = 100
+
+# Read later list counts at most this many saves for its approximate total, 0 disables the total
+NEWS_READ_LATER_COUNT_CAP = 1000
+
+# Seconds a rendered feed article can be opened by id (news.article_store.ArticleStore)
+NEWS_ARTICLE_STORE_TTL = 86400
+NEWS_ARTICLE_STORE_CACHE = 'articles'
+
+# Seconds rendered article cards and the feed sidebar stay cached, per interface language
+NEWS_FRAGMENT_CACHE_TTL = 3600
+
+# Seconds a feed page rendered for guests is reused (news.page_cache). Pages rendered
+# before the last ingestion are not served
+NEWS_PAGE_CACHE_TTL = 300
+
+# Seconds the feed version (time of the newest stored article) is read from the
+# cache instead of the database. Each process notices an ingestion this late at most
+NEWS_FEED_VERSION_TTL = 15
+
+# Seconds the first-seen time of a page ETag is kept, it is sent as Last-Modified
+NEWS_VALIDATOR_TTL = 86400
+
+# Image proxy (news.images.ImageProxy). Images are shrunk to fit these boxes
+NEWS_IMAGE_SIZES = {
+    'card': (640, 400),
+    'detail': (1280, 800),
+}
+NEWS_IMAGE_CACHE_DIR = config('NEWS_IMAGE_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'images'))
+NEWS_IMAGE_CACHE_MAX_BYTES = config('NEWS_IMAGE_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+NEWS_IMAGE_MAX_SOURCE_BYTES = 15 * 1024 * 1024
+# Images with more pixels are not decoded (JPEGs are counted after draft scaling)
+NEWS_IMAGE_MAX_PIXELS = 25_000_000
+NEWS_IMAGE_MAX_REDIRECTS = 3
+NEWS_IMAGE_FETCH_TIMEOUT = 10
+NEWS_IMAGE_QUALITY = 80
+# Seconds an image that failed to load is not fetched again
+NEWS_IMAGE_NEGATIVE_TTL = 3600
+# Browser cache lifetime of proxied images, their URLs never change content
+NEWS_IMAGE_MAX_AGE = 86400 * 365
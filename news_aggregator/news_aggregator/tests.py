@@ -53,17 +53,7 @@ class NewsAppEndToEndTest(TestCase):
         self.assertEqual(index_response.status_code, 200)
         self.assertTemplateUsed(index_response, 'news/index.html')
 
-        session = self.client.session
-        session['current_article'] = {
-            'title': self.article.title,
-            'description': self.article.description,
-            'content': self.article.content,
-            'url': self.article.url,
-            'source': self.article.source,
-        }
-        session.save()
-
-        detail_response = self.client.get(reverse('news:article_detail', kwargs={'article_url': self.article.url}))
+        detail_response = self.client.get(reverse('news:article_detail', kwargs={'article_id': self.article.short_id}))
         self.assertEqual(detail_response.status_code, 200)
         self.assertContains(detail_response, 'Test Article')
 
@@ -12,3 +12,26 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     });
 });
+
+const NO_IMAGE_HTML = '<div class="no-image"><svg width="64" height="64" viewBox="0 0 64 64" fill="none" xmlns="http://www.w3.org/2000/svg"><path d="M53.3334 8H10.6667C9.19394 8 8.00002 9.19391 8.00002 10.6667V53.3333C8.00002 54.8061 9.19394 56 10.6667 56H53.3334C54.8061 56 56 54.8061 56 53.3333V10.6667C56 9.19391 54.8061 8 53.3334 8Z" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/><path d="M22.6667 26.6667C24.8758 26.6667 26.6667 24.8758 26.6667 22.6667C26.6667 20.4575 24.8758 18.6667 22.6667 18.6667C20.4576 18.6667 18.6667 20.4575 18.6667 22.6667C18.6667 24.8758 20.4576 26.6667 22.6667 26.6667Z" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/><path d="M56 40L42.6667 26.6667L10.6667 56" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/></svg></div>';
+
+function showNoImage(img) {
+    img.parentElement.innerHTML = NO_IMAGE_HTML;
+}
+
+// Replaces broken card images with a placeholder. Error events do not bubble,
+// so they are caught in the capture phase; images that failed before this
+// script ran are found on DOMContentLoaded
+document.addEventListener('error', function(event) {
+    if (event.target.matches && event.target.matches('.news-image img')) {
+        showNoImage(event.target);
+    }
+}, true);
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.news-image img').forEach(img => {
+        if (img.complete && img.naturalWidth === 0) {
+            showNoImage(img);
+        }
+    });
+});
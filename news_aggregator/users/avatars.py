@@ -0,0 +1,99 @@
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from PIL import Image, ImageOps
+
+from .models import CustomUser
+
+
+class AvatarProcessor:
+    """Square WebP variants of profile pictures, made outside of the request.
+
+    Uploads are stored under a hash of their content and processed in a
+    background thread after the profile is saved (manage.py process_avatars
+    picks up anything left over, e.g. pictures uploaded in admin). Variant
+    names derive from the same hash, so their URLs never change content and
+    can be cached as immutable.
+    """
+    FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+    DIRECTORY = 'avatars'
+
+    _executor = None
+
+    @classmethod
+    def hashed_name(cls, upload):
+        """File name of an upload validated by forms.ImageField, hashed in chunks"""
+        digest = hashlib.sha256()
+        for chunk in upload.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()[:32] + cls.FORMATS[upload.image.format]
+
+    @classmethod
+    def submit(cls, user_id):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=settings.USERS_AVATAR_WORKERS,
+                thread_name_prefix='avatars',
+            )
+        cls._executor.submit(cls._process_by_id, user_id)
+
+    @classmethod
+    def process_pending(cls):
+        """Processes every picture without current variants. Returns number of processed users"""
+        users = CustomUser.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True)
+        processed = 0
+        for user in users.only('pk', 'profile_picture', 'avatar_variants').iterator():
+            processed += cls.process(user)
+        return processed
+
+    @classmethod
+    def process(cls, user):
+        """Writes all USERS_AVATAR_SIZES of the user's picture and records their names"""
+        picture = user.profile_picture
+        if not picture or user.avatar_variants.get('source') == picture.name:
+            return False
+
+        try:
+            with picture.open('rb') as file:
+                image = Image.open(file)
+                image.load()
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            print(f'Error processing profile picture {picture.name}: {e}')
+            return False
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+
+        variants = {'source': picture.name}
+        stem = PurePath(picture.name).stem
+        for size, pixels in settings.USERS_AVATAR_SIZES.items():
+            name = f'{cls.DIRECTORY}/{stem}-{pixels}.webp'
+            if not picture.storage.exists(name):
+                output = io.BytesIO()
+                ImageOps.fit(image, (pixels, pixels), Image.LANCZOS).save(
+                    output, 'WEBP', quality=settings.USERS_AVATAR_QUALITY
+                )
+                name = picture.storage.save(name, ContentFile(output.getvalue()))
+            variants[size] = name
+
+        # Not recorded if the picture was replaced meanwhile
+        return bool(
+            CustomUser.objects.filter(pk=user.pk, profile_picture=picture.name).update(avatar_variants=variants)
+        )
+
+    @classmethod
+    def _process_by_id(cls, user_id):
+        try:
+            user = CustomUser.objects.filter(pk=user_id).only('pk', 'profile_picture', 'avatar_variants').first()
+            if user:
+                cls.process(user)
+        except Exception as e:
+            print(f'Error processing profile picture of user {user_id}: {e}')
+        finally:
+            connections.close_all()
@@ -1,7 +1,11 @@
 from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
 from django.utils.translation import gettext_lazy as _
 from .models import CustomUser
+from .avatars import AvatarProcessor
 
 
 class RegisterForm(UserCreationForm):
@@ -64,6 +68,36 @@ class ProfileUpdateForm(forms.ModelForm):
             'last_name': forms.TextInput(attrs={'class': 'form-input'}),
         }
 
+    def clean_profile_picture(self):
+        """Checks size, format and dimensions of a new picture and names it by content hash"""
+        picture = self.cleaned_data.get('profile_picture')
+        if not isinstance(picture, UploadedFile):
+            return picture
+
+        if picture.size > settings.USERS_AVATAR_MAX_UPLOAD_BYTES:
+            raise forms.ValidationError(_('Image is too large.'))
+        # Set by forms.ImageField after Pillow verified the file
+        image = picture.image
+        if image.format not in AvatarProcessor.FORMATS:
+            raise forms.ValidationError(_('Unsupported image format.'))
+        if image.width * image.height > settings.USERS_AVATAR_MAX_PIXELS:
+            raise forms.ValidationError(_('Image is too large.'))
+
+        picture.name = AvatarProcessor.hashed_name(picture)
+        return picture
+
+    def save(self, commit=True):
+        """Resets variants of a changed picture and resizes it after the transaction commits"""
+        user = super().save(commit=False)
+        changed = 'profile_picture' in self.changed_data
+        if changed:
+            user.avatar_variants = {}
+        if commit:
+            user.save()
+            if changed and user.profile_picture:
+                transaction.on_commit(lambda: AvatarProcessor.submit(user.pk))
+        return user
+
 
 class CustomPasswordChangeForm(PasswordChangeForm):
     """Change password form."""
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.avatars import AvatarProcessor
+
+
+class Command(BaseCommand):
+    help = 'Resizes profile pictures that have no variants yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between runs')
+        parser.add_argument('--once', action='store_true', help='Process once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            processed = AvatarProcessor.process_pending()
+            self.stdout.write(f'Processed {processed} profile pictures in {time.monotonic() - started:.1f}s')
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -10,6 +10,12 @@ class CustomUser(AbstractUser):
         null=True,
         verbose_name='Фото профілю'
     )
+    avatar_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Розміри фото профілю'
+    )
 
     class Meta:
         verbose_name = 'Користувач'
@@ -17,3 +23,12 @@ class CustomUser(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    def avatar_url(self, size):
+        """URL of the picture in one of USERS_AVATAR_SIZES, the original one until it is processed"""
+        if not self.profile_picture:
+            return ''
+        name = None
+        if self.avatar_variants.get('source') == self.profile_picture.name:
+            name = self.avatar_variants.get(size)
+        return self.profile_picture.storage.url(name) if name else self.profile_picture.url
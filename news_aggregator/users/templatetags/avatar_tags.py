@@ -0,0 +1,9 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def avatar(user, size):
+    """URL of the user's profile picture in one of USERS_AVATAR_SIZES"""
+    return user.avatar_url(size)
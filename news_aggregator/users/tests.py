@@ -1,6 +1,14 @@
-from django.test import TestCase, Client
+import io
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from .avatars import AvatarProcessor
 
 User = get_user_model()
 
@@ -209,3 +217,68 @@ class UserModelTestCase(TestCase):
 
         self.assertTrue(admin.is_staff)
         self.assertTrue(admin.is_superuser)
+
+
+def make_upload(width=600, height=400, image_format='PNG', name='photo.png'):
+    body = io.BytesIO()
+    Image.new('RGB', (width, height), 'blue').save(body, image_format)
+    return SimpleUploadedFile(name, body.getvalue(), content_type='image/png')
+
+
+class AvatarProcessingTestCase(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def upload(self, picture):
+        return self.client.post(reverse('users:profile'), {
+            'username': 'testuser',
+            'email': 'test@example.com',
+            'profile_picture': picture,
+        })
+
+    @mock.patch('users.forms.AvatarProcessor.submit')
+    def test_upload_is_hashed_and_processed_after_commit(self, submit):
+        """Request only stores the upload, resizing is queued for the background"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(make_upload())
+
+        self.assertEqual(response.status_code, 302)
+        submit.assert_called_once_with(self.user.pk)
+        self.user.refresh_from_db()
+        self.assertRegex(self.user.profile_picture.name, r'^profile_pics/[0-9a-f]{32}\.png$')
+        self.assertEqual(self.user.avatar_url('small'), self.user.profile_picture.url)
+
+    @mock.patch('users.forms.AvatarProcessor.submit')
+    def test_variants_replace_original_in_templates(self, submit):
+        """Processed pictures are served as square variants with content-hashed names"""
+        self.upload(make_upload())
+
+        self.assertEqual(AvatarProcessor.process_pending(), 1)
+        self.assertEqual(AvatarProcessor.process_pending(), 0)
+        self.user.refresh_from_db()
+        small = self.user.avatar_variants['small']
+        self.assertEqual(small, 'avatars/%s-80.webp' % self.user.profile_picture.name[13:45])
+        with self.user.profile_picture.storage.open(small) as file:
+            self.assertEqual(Image.open(file).size, (80, 80))
+
+        response = self.client.get(reverse('users:profile'))
+        self.assertContains(response, self.user.avatar_url('large'))
+        self.assertContains(response, self.user.avatar_url('small'))
+        self.assertNotContains(response, 'src="%s"' % self.user.profile_picture.url)
+
+    @override_settings(USERS_AVATAR_MAX_PIXELS=1000)
+    def test_oversized_and_invalid_uploads_are_rejected(self):
+        """Uploads are validated before anything is stored"""
+        self.upload(make_upload())
+        self.upload(SimpleUploadedFile('photo.png', b'not an image', content_type='image/png'))
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.profile_picture)